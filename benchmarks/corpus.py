@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Synthetic Java corpus for benchmarking the Java Style Checker
+
+Generates compilable-looking Java classes of a controlled size and style:
+
+    nested        deeply nested loops and conditionals
+    declarations  many variable declarations and method headers
+    comments      heavy line, block and javadoc comments
+    forbidden     lots of forbidden features and bad style
+    mixed         all of the above, interleaved
+
+Usage: python benchmarks/corpus.py OUTPUT_DIR [--lines N] [--files N]
+       [--style STYLE] [--seed N]
+"""
+import argparse
+import os
+import random
+
+STYLES = ('nested', 'declarations', 'comments', 'forbidden', 'mixed')
+
+TYPES = ('int', 'double', 'String', 'boolean', 'char', 'int[]', 'Random',
+         'Scanner', 'File', 'Graphics')
+NAMES = ('count', 'total', 'index', 'value', 'result', 'name', 'x', 'i',
+         'numberOfItems', 'max_value', 'Temp', 'sum', 'a', 'current')
+
+FORBIDDEN = (
+    'break;',
+    'continue;',
+    'StringBuilder builder = new StringBuilder();',
+    'var copy = {name};',
+    'Arrays.sort(data);',
+    'Arrays.fill(data, 0);',
+    'int[] other = Arrays.copyOf(data, 3);',
+    'int[] part = Arrays.copyOfRange(data, 0, 2);',
+    'Collections.sort(list);',
+    'Object[] items = list.toArray();',
+    'char[] letters = {name}.toCharArray();',
+    'String joined = String.join(",", {name});',
+    'boolean matched = {name}.matches("a*");',
+    'Scanner console = new Scanner(System.in);',
+    'Random rand = new Random();',
+    'System.out.println("");',
+    'System.out.print("done\\n");',
+    'if ({name} == true) {{ {name}++; }}',
+    'int {name} = 1; int {name}2 = 2;',
+)
+
+
+class Generator:
+    """Builds the body lines of one class in a given style"""
+
+    def __init__(self, style, seed):
+        self.style = style
+        self.random = random.Random(seed)
+        self.lines = []
+
+    def emit(self, depth, text=''):
+        self.lines.append('    ' * depth + text if text else '')
+
+    def name(self):
+        return self.random.choice(NAMES)
+
+    def statement(self, depth):
+        """One simple statement"""
+        self.emit(depth, f'{self.name()} = {self.name()} + '
+                         f'{self.random.randint(0, 99)};')
+
+    def nested(self, depth, budget):
+        """Loops and conditionals nested up to eight levels"""
+        if depth > 9 or budget < 3:
+            self.statement(depth)
+            return 1
+        header = self.random.choice((
+            f'for (int i = 0; i < {self.name()}; i++) {{',
+            f'while ({self.name()} > 0) {{',
+            f'if ({self.name()} < {self.random.randint(0, 9)}) {{',
+        ))
+        self.emit(depth, header)
+        used = 2
+        while used < budget:
+            if self.random.random() < 0.6:
+                used += self.nested(depth + 1, (budget - used) // 2)
+            else:
+                self.statement(depth + 1)
+                used += 1
+        self.emit(depth, '}')
+        return used
+
+    def declarations(self, depth, budget):
+        """Variable declarations, well and badly named"""
+        for _ in range(budget):
+            type = self.random.choice(TYPES)
+            if self.random.random() < 0.5:
+                self.emit(depth, f'{type} {self.name()};')
+            else:
+                self.emit(depth, f'{type} {self.name()} = {self.name()};')
+        return budget
+
+    def comments(self, depth, budget):
+        """Line, trailing and block comments"""
+        used = 0
+        while used < budget:
+            kind = self.random.random()
+            if kind < 0.4:
+                self.emit(depth, f'// update {self.name()} before the loop')
+                used += 1
+            elif kind < 0.7:
+                self.emit(depth, f'{self.name()}++; // keep {self.name()} '
+                                 'in sync')
+                used += 1
+            else:
+                self.emit(depth, '/*')
+                for _ in range(self.random.randint(1, 4)):
+                    self.emit(depth, f' * {self.name()} holds the '
+                                     f'{self.name()} so far')
+                    used += 1
+                self.emit(depth, ' */')
+                used += 2
+        return used
+
+    def forbidden(self, depth, budget):
+        """Forbidden features and other style errors"""
+        for _ in range(budget):
+            self.emit(depth, self.random.choice(FORBIDDEN).format(
+                name=self.name()))
+        return budget
+
+    def method(self, index, budget):
+        """One method whose body uses about budget lines"""
+        params = ', '.join(f'{self.random.choice(TYPES)} {self.name()}'
+                           for _ in range(self.random.randint(0, 3)))
+        if self.style == 'comments':
+            self.emit(1, '/**')
+            self.emit(1, f' * Computes part {index} of the result.')
+            self.emit(1, ' */')
+            budget -= 3
+        self.emit(1, f'public static int method{index}({params}) {{')
+        styles = STYLES[:-1] if self.style == 'mixed' else (self.style,)
+        used = 0
+        while used < budget - 3:
+            style = self.random.choice(styles)
+            chunk = min(budget - 3 - used, self.random.randint(3, 12))
+            used += getattr(self, style)(2, chunk)
+        self.emit(2, 'return 0;')
+        self.emit(1, '}')
+        self.emit(1)
+
+
+def generate(lines=1000, style='mixed', seed=0, name='Bench'):
+    """Returns Java source of about lines lines in the given style"""
+    if style not in STYLES:
+        raise ValueError(f'style should be one of {", ".join(STYLES)}')
+    generator = Generator(style, seed)
+    index = 0
+    while len(generator.lines) < lines - 4:
+        budget = min(lines - 4 - len(generator.lines),
+                     generator.random.randint(15, 60))
+        generator.method(index, max(budget, 6))
+        index += 1
+    return '\n'.join(['import java.util.*;', '',
+                      f'public class {name} {{'] + generator.lines +
+                     ['}', ''])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--lines', type=int, default=1000)
+    parser.add_argument('--files', type=int, default=1)
+    parser.add_argument('--style', choices=STYLES, default='mixed')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for index in range(args.files):
+        name = f'{args.style.capitalize()}{index}'
+        with open(os.path.join(args.output, name + '.java'), 'w') as f:
+            f.write(generate(args.lines, args.style, args.seed + index, name))
+
+
+if __name__ == '__main__':
+    main()
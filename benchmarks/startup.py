@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the Java Style Checker
+
+Times fresh interpreters importing style_checker_modular and running main()
+on a small file, which is what a grading harness spawning one process per
+file pays for every submission.
+
+Usage: python benchmarks/startup.py [--runs N] [--file FILE] [--save]
+       [--max-regression PERCENT]
+
+--save stores the fastest times as the baseline
+(benchmarks/startup_baseline.json), later runs compare against it and exit
+non-zero if any case got slower than --max-regression percent.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmarks', 'startup_baseline.json')
+
+CASES = {
+    'interpreter': 'pass',
+    'import': 'import style_checker_modular',
+    'main (web)': 'import style_checker_modular as m; '
+                  'm.main({file!r}, "web", False, False, None)',
+    'main (visible)': 'import style_checker_modular as m; '
+                      'm.main({file!r}, "visible", False, False, None)',
+}
+
+
+def time_case(code, runs):
+    """Returns wall times (ms) of running code in fresh interpreters"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # measure an installed checker, whose bytecode is cached
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--file', default=os.path.join(ROOT, 'Test.java'))
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--max-regression', type=float, default=25.0)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.save:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    # one warm-up run so that bytecode caches exist
+    time_case(CASES['import'], 1)
+
+    results = {}
+    regressed = False
+    print(f'{"case":<16}{"min ms":>10}{"median ms":>12}{"baseline":>12}')
+    for name, code in CASES.items():
+        times = time_case(code.format(file=args.file), args.runs)
+        results[name] = min(times)
+        line = f'{name:<16}{min(times):>10.1f}{statistics.median(times):>12.1f}'
+        if name in baseline:
+            change = (min(times) / baseline[name] - 1) * 100
+            line += f'{baseline[name]:>12.1f} ({change:+.0f}%)'
+            # the bare interpreter is only there for reference
+            if name != 'interpreter':
+                regressed |= change > args.max_regression
+        print(line)
+
+    if args.save:
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {BASELINE}')
+    elif regressed:
+        sys.exit(f'Cold start regressed by more than {args.max_regression}%')
+
+
+if __name__ == '__main__':
+    main()
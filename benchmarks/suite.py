@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for the Java Style Checker
+
+Checks synthetic files from benchmarks/corpus.py in every mode, timing
+run_tests end to end and each stage of it on its own (reading, comment
+handling, indentation, rule checks and rendering the report), along with
+lines per second and peak memory.
+
+Usage: python benchmarks/suite.py [--lines N] [--runs N] [--style STYLE]
+       [--mode MODE] [--save] [--max-regression PERCENT]
+
+--save stores the results as the baseline (benchmarks/suite_baseline.json),
+later runs compare lines per second and peak memory against it and exit
+non-zero if any case got worse than --max-regression percent.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from corpus import STYLES, generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmarks', 'suite_baseline.json')
+MODES = ('visible', 'private', 'web')
+STAGES = ('read', 'comments', 'indent', 'rules', 'render')
+
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+
+def timed(stage, method):
+    """Wraps a checker method so that its time adds up under stage"""
+    def _timed(self, *args):
+        start = time.perf_counter()
+        result = method(self, *args)
+        self.stages[stage] += time.perf_counter() - start
+        return result
+    return _timed
+
+
+class TimedChecker(checker.CSE142Checker):
+    """CSE142Checker adding the time spent in each stage to stages"""
+
+    stages = Counter()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        present = self.report.present_file_results
+
+        def _present():
+            start = time.perf_counter()
+            result = present()
+            self.stages['render'] += time.perf_counter() - start
+            return result
+        self.report.present_file_results = _present
+
+    handle_comments = timed('comments', checker.CSE142Checker.handle_comments)
+    handle_indentation = timed('indent',
+                               checker.CSE142Checker.handle_indentation)
+    display_results = timed('rules', checker.CSE142Checker.display_results)
+
+
+def time_end_to_end(guide, filename, runs):
+    """Returns the fastest time (s) of run_tests on filename"""
+    times = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            guide.run_tests(filename)
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_stages(guide, filename, runs):
+    """Returns the fastest time (s) of each stage over runs"""
+    best = {}
+    guide.checker_class = TimedChecker
+    try:
+        for _ in range(runs):
+            stages = TimedChecker.stages = Counter()
+            start = time.perf_counter()
+            lines = checker.readlines(filename)
+            stages['read'] = time.perf_counter() - start
+            guide.check(filename, lines=lines)
+            for stage in STAGES:
+                best[stage] = min(best.get(stage, float('inf')), stages[stage])
+    finally:
+        guide.checker_class = checker.CSE142Checker
+    return best
+
+
+def peak_memory(guide, filename):
+    """Returns the peak memory (bytes) allocated by one run_tests"""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            guide.run_tests(filename)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--style', choices=STYLES, action='append')
+    parser.add_argument('--mode', choices=MODES, action='append')
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--max-regression', type=float, default=25.0)
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.save:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressed = False
+    print(f'{"case":<24}{"lines/s":>10}{"total ms":>10}' +
+          ''.join(f'{stage:>10}' for stage in STAGES) +
+          f'{"peak MB":>10}{"baseline":>12}')
+    with tempfile.TemporaryDirectory() as directory:
+        for style in args.style or STYLES:
+            filename = os.path.join(directory, f'{style.capitalize()}.java')
+            with open(filename, 'w') as f:
+                f.write(generate(args.lines, style))
+            total_lines = len(checker.readlines(filename))
+
+            for mode in args.mode or MODES:
+                name = f'{style} ({mode})'
+                guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+                total = time_end_to_end(guide, filename, args.runs)
+                stages = time_stages(guide, filename, args.runs)
+                peak = peak_memory(guide, filename)
+                results[name] = {'lines_per_second': total_lines / total,
+                                  'peak_bytes': peak}
+
+                line = (f'{name:<24}{total_lines / total:>10.0f}'
+                        f'{total * 1000:>10.1f}' +
+                        ''.join(f'{stages[stage] * 1000:>10.1f}'
+                                for stage in STAGES) +
+                        f'{peak / 2 ** 20:>10.2f}')
+                if name in baseline:
+                    before = baseline[name]
+                    slower = (before['lines_per_second'] * total /
+                              total_lines - 1) * 100
+                    larger = (peak / before['peak_bytes'] - 1) * 100
+                    line += (f'{before["lines_per_second"]:>12.0f} '
+                             f'({-slower:+.0f}% speed, {larger:+.0f}% memory)')
+                    regressed |= max(slower, larger) > args.max_regression
+                print(line)
+
+    if args.save:
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {BASELINE}')
+    elif regressed:
+        sys.exit(f'Throughput or memory regressed by more than {args.max_regression}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Java Style Checker client
+
+Sends a file to a running checker daemon and prints the result, taking the
+same arguments as style_checker_modular.py. Start the daemon once with
+`python style_checker_modular.py --daemon`; without one, the file is checked
+in this process instead.
+
+Usage: python style_checker_client.py [CLASS_NAME].java visible|private|web
+       [verbose] [debug]
+"""
+import json
+import os
+import socket
+import sys
+
+
+def default_socket():
+    """Path of the daemon's Unix socket, CHECKER_SOCKET if set"""
+    return os.environ.get('CHECKER_SOCKET') or os.path.join(
+        os.environ.get('TMPDIR', '/tmp'),
+        f'java-style-checker-{os.getuid()}.sock')
+
+
+def request(message, path=None):
+    """Sends one request to the daemon, returns its response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path or default_socket())
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        response = b''.join(iter(lambda: sock.recv(65536), b''))
+    return json.loads(response)
+
+
+def main(argv):
+    if len(argv) < 3:
+        sys.exit(__doc__.split('\n\n')[-1].strip())
+    filename, mode = argv[1], argv[2]
+    verbose = len(argv) > 3 and bool(argv[3])
+    debug = len(argv) > 4 and bool(argv[4])
+    try:
+        width = os.get_terminal_size(sys.stdout.fileno()).columns
+    except OSError:
+        width = None
+
+    rules = os.environ.get('CHECKER_RULES')
+    if rules:
+        rules = os.path.abspath(rules)
+
+    try:
+        response = request({
+            'path': os.path.abspath(filename), 'filename': filename,
+            'mode': mode, 'verbose': verbose, 'debug': debug,
+            'terminal': sys.stdout.isatty(), 'width': width, 'rules': rules,
+        })
+    except (FileNotFoundError, ConnectionRefusedError):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import style_checker_modular
+        result = style_checker_modular.main(filename, mode, verbose, debug,
+                                            None, rules=rules)
+        if mode == 'web':
+            print(json.dumps(result))
+        return
+
+    if 'error' in response:
+        sys.exit(response['error'])
+    if mode == 'web':
+        print(json.dumps(response['output']))
+    else:
+        sys.stdout.write(response['output'])
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -8,67 +8,105 @@ Usage: (Supports python 3.x)
 authors: Omar, Sumant, Aidan
 emails: oibra@uw.edu, guhas2@uw.edu, thalea@uw.edu
 """
+import bisect
+import functools
+import itertools
+import operator
+import os
 import re
 import sys
-import subprocess
-import traceback
-import inspect
-import tokenize
-from configparser import RawConfigParser
-from io import TextIOWrapper
-import rich
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from io import BytesIO, StringIO, TextIOWrapper
+from types import FunctionType
 
+# Heavier modules (rich, tokenize, hashlib, pickle, concurrent.futures,
+# traceback, glob) are imported where they are used, so that importing the
+# checker, or using it in web mode, stays cheap.
+
+
+@functools.lru_cache(maxsize=None)
+def get_console():
+    """The rich Console, created on first use"""
+    from rich.console import Console
+    return Console()
+
+
+def __getattr__(name):
+    if name == 'console':
+        return get_console()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.syntax import Syntax
-console = Console()
 
 # Global Setup
-NUM_CONSOLE_SCANNER = 0
-NUM_RANDOM = 0
 DEBUG = False
 
 # Regex Setup
-BLANK_PRINTLNS = re.compile(r'System\.out\.println[\s]*\(""\)')
-BOOLEAN_TRUE = re.compile(r'(.*)==( *)true(.*)')
-BOOLEAN_FALSE = re.compile(r'(.*)==( *)false(.*)')
-BREAK = re.compile(r'break[\s]*;')
-CONTINUE = re.compile(r'continue[\s]*;')
-CATCH = re.compile(r'catch[\s]*\(.*\){')
-VAR = re.compile(r'var.*=')
-TO_ARRAY = re.compile(r'\.toArray.*')
-STRING_BUILDER = re.compile(r'StringBuilder.*')
-STRING_BUFFER = re.compile(r'StringBuffer')
-STRING_JOINER = re.compile(r'StringJoiner')
-STRING_TOKENIZER = re.compile(r'StringTokenizer')
-TO_CHAR_ARRAY = re.compile(r'\.toCharArray.*')
-CONSOLE_SCANNER = re.compile(r'.*new.*Scanner.*\(.*System.*\.in.*\).*')
-RANDOM = re.compile(r'.*new.*Random.*\(.*\).*')
-FILE_READER = re.compile(r'FileReader')
-FILE_WRITER = re.compile(r'FileWriter')
-BUFFERED_READER = re.compile(r'BufferedReader')
-STRING_JOIN = re.compile(r'\.join')
-STRING_MATCHES = re.compile(r'\.matches')
-ARRAYS_AS_LIST = re.compile(r'Arrays\.asList')
-ARRAYS_FILL = re.compile(r'Arrays\.fill')
-ARRAYS_COPY_OF = re.compile(r'Arrays\.copyOf')
-ARRAYS_COPY_OF_RANGE = re.compile(r'Arrays\.copyOfRange')
-ARRAYS_SORT = re.compile(r'Arrays\.sort')
-COLLECTIONS_COPY = re.compile(r'Collections\.copy')
-COLLECTIONS_SORT = re.compile(r'Collections\.sort')
-BACKSLASH_N = re.compile(r'\\n')
-BACKSLASH_N_CORRECT = re.compile(r'printf\(\'|\".*\\n\'|\"\)')
-CAMEL_CASING = re.compile(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+class LazyPattern:
+    """A regex compiled on first use; each method used is then cached on the
+    instance, so later calls cost the same as on the compiled pattern"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(self.pattern), name)
+        setattr(self, name, value)
+        return value
+
+
+BLANK_PRINTLNS = LazyPattern(r'System\.out\.println[\s]*\(""\)')
+BOOLEAN_TRUE = LazyPattern(r'(.*)==( *)true(.*)')
+BOOLEAN_FALSE = LazyPattern(r'(.*)==( *)false(.*)')
+BREAK = LazyPattern(r'break[\s]*;')
+CONTINUE = LazyPattern(r'continue[\s]*;')
+CATCH = LazyPattern(r'catch[\s]*\(.*\){')
+VAR = LazyPattern(r'var.*=')
+TO_ARRAY = LazyPattern(r'\.toArray.*')
+STRING_BUILDER = LazyPattern(r'StringBuilder.*')
+STRING_BUFFER = LazyPattern(r'StringBuffer')
+STRING_JOINER = LazyPattern(r'StringJoiner')
+STRING_TOKENIZER = LazyPattern(r'StringTokenizer')
+TO_CHAR_ARRAY = LazyPattern(r'\.toCharArray.*')
+CONSOLE_SCANNER = LazyPattern(r'.*new.*Scanner.*\(.*System.*\.in.*\).*')
+RANDOM = LazyPattern(r'.*new.*Random.*\(.*\).*')
+FILE_READER = LazyPattern(r'FileReader')
+FILE_WRITER = LazyPattern(r'FileWriter')
+BUFFERED_READER = LazyPattern(r'BufferedReader')
+STRING_JOIN = LazyPattern(r'\.join')
+STRING_MATCHES = LazyPattern(r'\.matches')
+ARRAYS_AS_LIST = LazyPattern(r'Arrays\.asList')
+ARRAYS_FILL = LazyPattern(r'Arrays\.fill')
+ARRAYS_COPY_OF = LazyPattern(r'Arrays\.copyOf')
+ARRAYS_COPY_OF_RANGE = LazyPattern(r'Arrays\.copyOfRange')
+ARRAYS_SORT = LazyPattern(r'Arrays\.sort')
+COLLECTIONS_COPY = LazyPattern(r'Collections\.copy')
+COLLECTIONS_SORT = LazyPattern(r'Collections\.sort')
+BACKSLASH_N = LazyPattern(r'\\n')
+BACKSLASH_N_CORRECT = LazyPattern(r'printf\(\'|\".*\\n\'|\"\)')
+CAMEL_CASING = LazyPattern(r'(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+BRACE = LazyPattern(r'[{}]')
+CLASS_HEADER = LazyPattern(r'\b(?:class|interface|enum|record)\b')
+NOT_METHOD_HEADER = LazyPattern(
+    r'^\s*}?\s*(?:if|else|for|while|do|switch|try|catch|finally|'
+    r'synchronized)\b|\bnew\b|=')
+MARKUP = LazyPattern(r'\[.*?\]')
+JAVA_TOKEN = LazyPattern(r'"(?:[^"\\]|\\.)*"?|\'(?:[^\'\\]|\\.)*\'?|//|/\*')
 
 _checks = {'visible': {}, 'private': {}}
 
+# Declaration found on a line, shared by the naming checks
+Declaration = namedtuple('Declaration', ['type', 'isVariable', 'name', 'params'])
+
+# Error found while streaming a file
+Diagnostic = namedtuple('Diagnostic', ['line', 'category', 'message', 'content'])
+
 
 def _get_parameters(function):
-    return [parameter.name
-            for parameter
-            in inspect.signature(function).parameters.values()
-            if parameter.kind == parameter.POSITIONAL_OR_KEYWORD]
+    code = function.__code__
+    return list(code.co_varnames[code.co_posonlyargcount:code.co_argcount])
 
 
 def add_check(check, code=None):
@@ -79,7 +117,7 @@ def add_check(check, code=None):
         else:
             _checks[kind][check] = (code or [''], args)
 
-    if inspect.isfunction(check):
+    if isinstance(check, FunctionType):
         args = _get_parameters(check)
         if args and args[0] in ('visible', 'private'):
             if code is None:
@@ -88,7 +126,16 @@ def add_check(check, code=None):
     return check
 
 
+def anchored(*literals):
+    """Only run a check on lines containing at least one of the literals"""
+    def _anchored(check):
+        check.anchors = literals
+        return check
+    return _anchored
+
+
 @add_check
+@anchored('("")')
 def check_blank_printlns(visible):
     """check for println("") instead of println()"""
     match = BLANK_PRINTLNS.search(visible)
@@ -106,30 +153,31 @@ def check_long_lines(visible, max_line_length):
 
 
 @add_check
-def check_consolescanner(visible):
+@anchored('Scanner')
+def check_consolescanner(visible, counts):
     """checks for new Scanner(System.in)"""
-    global NUM_CONSOLE_SCANNER
     match = CONSOLE_SCANNER.search(visible)
     key = 'Multiple console scanners'
     if match:
-        NUM_CONSOLE_SCANNER += 1
-        if NUM_CONSOLE_SCANNER == 2:
+        counts[key] += 1
+        if counts[key] == 2:
             return [key, BANK[key]]
 
 
 @add_check
-def check_random(visible):
+@anchored('Random')
+def check_random(visible, counts):
     """checks for new Random()"""
-    global NUM_RANDOM
     match = RANDOM.search(visible)
     key = 'Multiple random objects'
     if match:
-        NUM_RANDOM += 1
-        if NUM_RANDOM == 2:
+        counts[key] += 1
+        if counts[key] == 2:
             return [key, BANK[key]]
 
 
 @add_check
+@anchored('true', 'false')
 def check_bad_boolean_zen(visible):
     """checks if boolean zen is good"""
     match_true = BOOLEAN_TRUE.search(visible)
@@ -153,16 +201,18 @@ def check_multiplestatements(visible):
 
 
 @add_check
-def check_backslashn(visible):
+def check_backslashn(visible, text):
     """checks for backslash n on a line"""
-    match = BACKSLASH_N.search(
-        visible) and not BACKSLASH_N_CORRECT.search(visible)
+    # \n only occurs inside literals, which are masked in visible
+    match = '\\n' in text and BACKSLASH_N.search(
+        text) and not BACKSLASH_N_CORRECT.search(text)
     key = '\\n on line'
     if match:
         return [key, BANK[key]]
 
 
 @add_check
+@anchored('break')
 def check_break(visible):
     """checks for break"""
     match = BREAK.search(visible)
@@ -172,6 +222,7 @@ def check_break(visible):
 
 
 @add_check
+@anchored('continue')
 def check_continue(visible):
     """checks for continue"""
     match = CONTINUE.search(visible)
@@ -181,6 +232,7 @@ def check_continue(visible):
 
 
 @add_check
+@anchored('catch')
 def check_try_catch(visible):
     """checks for try/catch statements"""
     match = CATCH.search(visible)
@@ -190,6 +242,7 @@ def check_try_catch(visible):
 
 
 @add_check
+@anchored('var')
 def check_var(visible):
     """checks for var statements"""
     match = VAR.search(visible)
@@ -199,6 +252,7 @@ def check_var(visible):
 
 
 @add_check
+@anchored('.toArray')
 def check_toarray(visible):
     """checks for .toArray statements"""
     match = TO_ARRAY.search(visible)
@@ -208,6 +262,7 @@ def check_toarray(visible):
 
 
 @add_check
+@anchored('StringBuilder')
 def check_stringbuilder(visible):
     """checks for StringBuilder declerations"""
     match = STRING_BUILDER.search(visible)
@@ -217,6 +272,7 @@ def check_stringbuilder(visible):
 
 
 @add_check
+@anchored('StringBuffer')
 def check_stringbuffer(visible):
     """checks for StringBuffer declerations"""
     match = STRING_BUFFER.search(visible)
@@ -226,6 +282,7 @@ def check_stringbuffer(visible):
 
 
 @add_check
+@anchored('StringJoiner')
 def check_stringjoiner(visible):
     """checks for StringJoiner declerations"""
     match = STRING_JOINER.search(visible)
@@ -235,6 +292,7 @@ def check_stringjoiner(visible):
 
 
 @add_check
+@anchored('StringTokenizer')
 def check_stringtokenizer(visible):
     """checks for StringTokenizer declerations"""
     match = STRING_TOKENIZER.search(visible)
@@ -244,6 +302,7 @@ def check_stringtokenizer(visible):
 
 
 @add_check
+@anchored('.toCharArray')
 def check_tochararray(visible):
     """checks for .toCharArray() calls"""
     match = TO_CHAR_ARRAY.search(visible)
@@ -253,6 +312,7 @@ def check_tochararray(visible):
 
 
 @add_check
+@anchored('FileReader')
 def check_filereader(visible):
     """checks for FileReader()"""
     match = FILE_READER.search(visible)
@@ -262,6 +322,7 @@ def check_filereader(visible):
 
 
 @add_check
+@anchored('FileWriter')
 def check_filewriter(visible):
     """checks for FileWriter()"""
     match = FILE_WRITER.search(visible)
@@ -271,6 +332,7 @@ def check_filewriter(visible):
 
 
 @add_check
+@anchored('BufferedReader')
 def check_bufferedreader(visible):
     """checks for BufferedReader()"""
     match = BUFFERED_READER.search(visible)
@@ -280,6 +342,7 @@ def check_bufferedreader(visible):
 
 
 @add_check
+@anchored('.join')
 def check_stringjoin(visible):
     """checks for String.join()"""
     match = STRING_JOIN.search(visible)
@@ -289,6 +352,7 @@ def check_stringjoin(visible):
 
 
 @add_check
+@anchored('.matches')
 def check_stringmatches(visible):
     """checks for String.matches()"""
     match = STRING_MATCHES.search(visible)
@@ -298,6 +362,7 @@ def check_stringmatches(visible):
 
 
 @add_check
+@anchored('Arrays.asList')
 def check_arraysaslist(visible):
     """checks for Arrays.asList()"""
     match = ARRAYS_AS_LIST.search(visible)
@@ -307,6 +372,7 @@ def check_arraysaslist(visible):
 
 
 @add_check
+@anchored('Arrays.copyOf')
 def check_arrayscopyof(visible):
     """checks for Arrays.copyOf()"""
     match = ARRAYS_COPY_OF.search(visible)
@@ -317,6 +383,7 @@ def check_arrayscopyof(visible):
 
 
 @add_check
+@anchored('Arrays.copyOf')
 def check_arrayscopyofrange(visible):
     """checks for Arrays.copyOfRange()"""
     match = ARRAYS_COPY_OF_RANGE.search(visible)
@@ -326,6 +393,7 @@ def check_arrayscopyofrange(visible):
 
 
 @add_check
+@anchored('Arrays.sort')
 def check_arrayssort(visible):
     """checks for Arrays.sort()"""
     match = ARRAYS_SORT.search(visible)
@@ -335,6 +403,7 @@ def check_arrayssort(visible):
 
 
 @add_check
+@anchored('Arrays.fill')
 def check_arraysfill(visible):
     """checks for Arrays.fill()"""
     match = ARRAYS_FILL.search(visible)
@@ -344,6 +413,7 @@ def check_arraysfill(visible):
 
 
 @add_check
+@anchored('Collections.copy')
 def check_collectionscopy(visible):
     """checks for Collections.copy()"""
     match = COLLECTIONS_COPY.search(visible)
@@ -353,6 +423,7 @@ def check_collectionscopy(visible):
 
 
 @add_check
+@anchored('Collections.sort')
 def check_collectionssort(visible):
     """checks for Collections.sort()"""
     match = COLLECTIONS_SORT.search(visible)
@@ -362,92 +433,55 @@ def check_collectionssort(visible):
 
 
 @add_check
-def check_camelcasing(visible):
+def check_camelcasing(visible, declaration):
     """checks for non camelCased variables"""
-    rv = _getProperties(visible)
-    if rv is None:
+    if declaration is None:
         return
-    type, isVariable, name, params = rv
     key = 'Incorrect camel casing'
-    if params is not None:
-        vars = []
-        params = params[2:-1]
-        # print(params)
-        if params:
-            vars.append(params[0].split('(')[-1])
-            for p in params[1:-1]:
-                p = p.replace(',', '')
-                vars.append(p)
-            vars.append(params[-1].split(')')[0])
-            if 'throws' in vars:
-                idx = vars.index('throws')
-                vars = vars[:idx]
-            for _type, _name in _pairwise(vars):
-                if _name.isalpha() and not _camelHelper(_name):
-                    return [key, BANK[key]]
+    for _type, _name in declaration.params:
+        if _name.isalpha() and not _camelHelper(_name):
+            return [key, BANK[key]]
 
+    name = declaration.name
     if name is not None:
-        name = name.replace(';', '')
         if '_' in name or not _camelHelper(name):
             return [key, BANK[key]]
 
 
 @add_check
-def check_nondescriptivevariables(visible):
+def check_nondescriptivevariables(visible, declaration, allowed_names):
     """checks for non descriptive variable names"""
-    rv = _getProperties(visible)
-    if rv is None:
+    if declaration is None:
         return
-    type, isVariable, name, params = rv
     key = 'Non-Descriptive variable name'
-    if params is not None:
-        vars = []
-        params = params[3:-1]
-        if params:
-            vars.append(params[0].split('(')[-1])
-            for p in params[1:-1]:
-                p = p.replace(',', '')
-                vars.append(p)
-            vars.append(params[-1].split(')')[0])
-            if 'throws' in vars:
-                idx = vars.index('throws')
-                vars = vars[:idx]
-            for _type, _name in _pairwise(vars):
-                if _name.isalpha() and not _nameHelper(_type, True, _name):
-                    return [key, BANK[key]]
+    for _type, _name in declaration.params:
+        if _name.isalpha() and not _nameHelper(_type, True, _name,
+                                               allowed_names):
+            return [key, BANK[key]]
 
+    type, isVariable, name, params = declaration
     if name is not None:
-        name = name.replace(';', '')
-        if '(' in type:
-            type = type.split('(')[1]
-        if name.isalpha() and not _nameHelper(type, isVariable, name):
+        if name.isalpha() and not _nameHelper(type, isVariable, name,
+                                              allowed_names):
             return [key, BANK[key]]
 
 
-def _pairwise(iterable):
-    """Returns a pairwise iterable version of iterable"""
-    a = iter(iterable)
-    return zip(a, a)
+# Short names that are fine for variables of a type
+ALLOWED_NAMES = {
+    'Graphics': frozenset({'g'}),
+    'int': frozenset({'x', 'y', 'i', 'j', 'k'}),
+    'double': frozenset({'x', 'y'}),
+    'Random': frozenset({'r'}),
+    'File': frozenset({'f'}),
+    'int[]': frozenset({'a', 'b'}),
+    'DrawingPanel': frozenset({'p'}),
+}
 
 
-def _nameHelper(type, isVariable, name):
+def _nameHelper(type, isVariable, name, allowed_names=ALLOWED_NAMES):
     """helper for checking if a word is non-descriptive"""
-    if isVariable:
-        if type == 'Graphics' and name == 'g':
-            return True
-        if ((type == 'int' or type == 'double') and (
-                name == 'x' or name == 'y')):
-            return True
-        if type == 'int' and (name == 'i' or name == 'j' or name == 'k'):
-            return True
-        if type == 'Random' and name == 'r':
-            return True
-        if type == 'File' and name == 'f':
-            return True
-        if type == 'int[]' and (name == 'a' or name == 'b'):
-            return True
-        if type == 'DrawingPanel' and name == 'p':
-            return True
+    if isVariable and name in allowed_names.get(type, ()):
+        return True
 
     if len(name) < 2:
         return False
@@ -456,7 +490,7 @@ def _nameHelper(type, isVariable, name):
 
 def _camelHelper(word):
     """helper for checking if a word is camelCased"""
-    split = re.split(CAMEL_CASING, word)
+    split = CAMEL_CASING.split(word)
     if not split[0].islower():
         return False
 
@@ -470,8 +504,8 @@ def _camelHelper(word):
     return True
 
 
-def _getProperties(visible):
-    """gets variable name, type and isVariable, params from a line"""
+def _getDeclaration(visible):
+    """gets variable type, isVariable, name and params from a line"""
     visible = visible.strip()
     split = re.split(' ', visible)
     if 'final' in visible or 'class' in visible or 'import' in visible:
@@ -480,7 +514,7 @@ def _getProperties(visible):
     name = None
     type = None
     isVariable = False
-    params = None
+    params = ()
     if (len(split) == 2 and 'return' not in visible and '++' not in split[0] and
             '++' not in split[1] and '--' not in split[0] and '--' not in split[1] and
             ';' in split[1]):
@@ -502,36 +536,609 @@ def _getProperties(visible):
                     name = split[2].split('(')[0]
                     type = split[1]
 
-        params = split
+        params = _getParams(visible)
 
-    return type, isVariable, name, params
+    if name is not None:
+        name = name.replace(';', '')
+    if type is not None and '(' in type:
+        type = type.split('(')[1]
+    return Declaration(type, isVariable, name, params)
+
+
+def _getParams(visible):
+    """gets the (type, name) pairs of a method header's parameter list"""
+    start = visible.find('(')
+    end = visible.find(')', start + 1)
+    if start == -1 or end == -1:
+        return ()
+    params = []
+    for param in visible[start + 1:end].split(','):
+        words = param.split()
+        if len(words) >= 2:
+            params.append((words[-2], words[-1]))
+    return tuple(params)
+
+
+# Lexing
+def lex(line, in_comment=False):
+    """Splits one line of Java into code, literals and comments in one scan.
+
+    Returns (code, text, spans, in_comment): code is the line without its
+    comments and with the contents of string and char literals masked, text
+    the line without its comments, spans the (kind, start, end) of each
+    literal and comment, and in_comment whether a block comment is still
+    open at the end of the line (pass it back in for the next line)."""
+    if not in_comment and '"' not in line and "'" not in line \
+            and '/' not in line:
+        return line, line, (), False
+
+    newline = '\n' if line.endswith('\n') else ''
+    body = line[:len(line) - len(newline)]
+    code = []
+    text = []
+    spans = []
+    pos = 0
+    if in_comment:
+        end = body.find('*/')
+        if end == -1:
+            return newline, newline, (('comment', 0, len(body)),), True
+        spans.append(('comment', 0, end + 2))
+        pos = end + 2
+        in_comment = False
+
+    search = JAVA_TOKEN.search
+    while True:
+        match = search(body, pos)
+        if match is None:
+            code.append(body[pos:])
+            text.append(body[pos:])
+            break
+        start, end = match.span()
+        token = match.group()
+        code.append(body[pos:start])
+        text.append(body[pos:start])
+        if token == '//':
+            spans.append(('comment', start, len(body)))
+            break
+        if token == '/*':
+            close = body.find('*/', start + 2)
+            if close == -1:
+                spans.append(('comment', start, len(body)))
+                in_comment = True
+                break
+            spans.append(('comment', start, close + 2))
+            pos = close + 2
+            # keep the tokens on either side apart, and leading indentation
+            # as it was
+            rest = body[pos:]
+            if ''.join(code).strip():
+                if not rest[:1].isspace():
+                    code.append(' ')
+                    text.append(' ')
+            else:
+                pos += len(rest) - len(rest.lstrip())
+            continue
+        spans.append(('string' if token[0] == '"' else 'char', start, end))
+        # masked with a lowercase letter so that literals still read as a
+        # single lowercase word to the naming checks, but spell no anchor
+        code.append(token[0] + 'x' * (len(token) - 2) + token[-1]
+                    if len(token) > 1 else token)
+        text.append(token)
+        pos = end
+
+    if not spans:
+        return line, line, (), False
+    code = ''.join(code)
+    text = ''.join(text)
+    if spans[-1][0] == 'comment' and spans[-1][2] == len(body):
+        code = code.rstrip()
+        text = text.rstrip()
+    return code + newline, text + newline, tuple(spans), in_comment
+
+
+# Structure Index
+class Structure:
+    """Classes, methods and other blocks of a file, found from its braces as
+    the file is checked.
+
+    Blocks are kept in parallel arrays indexed by block number (in opening
+    order): kinds, starts, ends (0 while open), depths and parents (-1 for
+    none). scopes[line - 1] is the innermost block holding a line, so what
+    encloses a line is found without scanning. With history off only the
+    open blocks are kept, which bounds memory when streaming."""
+
+    KINDS = ('class', 'method', 'block')
+    CLASS, METHOD, BLOCK = range(3)
+
+    def __init__(self, history=True):
+        self.history = history
+        self.kinds = bytearray()
+        self.starts = array('i')
+        self.ends = array('i')
+        self.depths = array('i')
+        self.parents = array('i')
+        self.scopes = array('i')
+        self.stack = []
+        self.header = ''
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def depth(self):
+        """Number of blocks open"""
+        return len(self.stack)
+
+    def kind_of(self, header):
+        """Kind of the block opened after header"""
+        if CLASS_HEADER.search(header):
+            return self.CLASS
+        if self.stack and self.kinds[self.stack[-1]] == self.CLASS \
+                and '(' in header and not NOT_METHOD_HEADER.search(header):
+            return self.METHOD
+        return self.BLOCK
+
+    def open(self, line_num, header):
+        """Opens a block on line_num after the code in header"""
+        index = len(self.kinds)
+        self.kinds.append(self.kind_of(header))
+        self.starts.append(line_num)
+        self.ends.append(0)
+        self.depths.append(len(self.stack))
+        self.parents.append(self.stack[-1] if self.stack else -1)
+        self.stack.append(index)
+        return index
+
+    def close(self, line_num):
+        """Closes the innermost block on line_num, returns its depth (-1 if
+        no block was open)"""
+        if not self.stack:
+            return -1
+        index = self.stack.pop()
+        self.ends[index] = line_num
+        if not self.history:
+            del self.kinds[index:], self.starts[index:], self.ends[index:], \
+                self.depths[index:], self.parents[index:]
+        return len(self.stack)
+
+    def update(self, line_num, code):
+        """Opens and closes the blocks of one line of code, returns the
+        depth of the last block closed on it (-1 if none)"""
+        closed = -1
+        scope = self.stack[-1] if self.stack else -1
+        if '{' in code or '}' in code:
+            pos = 0
+            for match in BRACE.finditer(code):
+                if match.group() == '{':
+                    header = code[pos:match.start()]
+                    scope = self.open(line_num, header if header.strip()
+                                      else self.header)
+                else:
+                    closed = self.close(line_num)
+                pos = match.end()
+        if code.strip():
+            self.header = code
+        if self.history:
+            self.scopes.append(scope)
+        return closed
+
+    def enclosing(self, line_num, kind=None):
+        """Innermost block (of kind, if given) holding line_num, or -1"""
+        index = self.scopes[line_num - 1] if line_num <= len(self.scopes) \
+            else -1
+        if kind is not None:
+            kind = self.KINDS.index(kind)
+            while index != -1 and self.kinds[index] != kind:
+                index = self.parents[index]
+        return index
+
+    def get_block(self, index):
+        """Returns (kind, start, end, depth) of a block"""
+        return (self.KINDS[self.kinds[index]], self.starts[index],
+                self.ends[index], self.depths[index])
+
+    def get_blocks(self, kind=None):
+        """Returns (kind, start, end, depth) of every block (of kind)"""
+        return [self.get_block(index) for index in range(len(self.kinds))
+                if kind is None or self.KINDS[self.kinds[index]] == kind]
+
+    def state(self):
+        """Everything that carries over to the next line"""
+        return (bytes(self.kinds[index] for index in self.stack),
+                self.header)
+
+    def restore(self, state):
+        """Continues from a state, keeping no history"""
+        kinds, self.header = state
+        self.history = False
+        del self.kinds[:], self.starts[:], self.ends[:], self.depths[:], \
+            self.parents[:], self.scopes[:]
+        self.stack = []
+        for kind in kinds:
+            index = self.open(0, '')
+            self.kinds[index] = kind
+
+
+# Rule Dispatch
+def _trie_pattern(literals):
+    """Builds a regex for literals shaped as a trie, so that sre only ever
+    follows one branch per character instead of trying every alternative"""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def _pattern(node):
+        branches = [re.escape(char) + _pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 \
+            else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return _pattern(trie)
+
+
+# Check arguments that change from line to line, read from the checker on
+# every call, and those set once per file, bound when the file starts. A
+# check taking any other checker attribute is refused, rather than being
+# handed the value it had before the first line.
+PER_LINE = frozenset({'declaration', 'text', 'spans'})
+PER_FILE = frozenset({'allowed_names', 'counts', 'filename', 'indent_type',
+                      'max_line_length', 'tab_size'})
+
+
+def _bind(check, names, checker):
+    """Returns check as a function of (line, checker), with the arguments
+    that stay the same for the whole file bound once"""
+    unknown = [name for name in names
+               if name not in PER_LINE and name not in PER_FILE]
+    if unknown:
+        raise TypeError(f'{check.__name__} takes {", ".join(unknown)}, '
+                        'which is neither in PER_LINE nor in PER_FILE')
+    if not names:
+        return lambda line, checker: check(line)
+    if len(names) == 1:
+        if names[0] in PER_LINE:
+            get = operator.attrgetter(names[0])
+            return lambda line, checker: check(line, get(checker))
+        value = getattr(checker, names[0])
+        return lambda line, checker: check(line, value)
+    if len(names) == 2 and names[0] in PER_LINE and names[1] not in PER_LINE:
+        get = operator.attrgetter(names[0])
+        value = getattr(checker, names[1])
+        return lambda line, checker: check(line, get(checker), value)
+    if PER_LINE.isdisjoint(names):
+        values = tuple(getattr(checker, name) for name in names)
+        return lambda line, checker: check(line, *values)
+    getters = [operator.attrgetter(name) if name in PER_LINE
+               else (lambda value: lambda checker: value)(getattr(checker, name))
+               for name in names]
+    return lambda line, checker: check(
+        line, *[get(checker) for get in getters])
+
+
+class RuleEngine:
+    """Compiled dispatch for the checks of one category.
+
+    One scan per line finds every @anchored literal in it; only the checks
+    whose anchor occurs, plus the unanchored ones, are run for that line.
+    Plans are tuples of check indices, shared by every file checked with this
+    engine; each file binds the checks to its own values once (see bind).
+    Anchors are looked for in the code of the line, outside of comments and
+    literals."""
+
+    def __init__(self, checks):
+        self.checks = checks
+        literals = {}
+        for index, (name, check, args) in enumerate(checks):
+            for literal in getattr(check, 'anchors', ()):
+                literals.setdefault(literal, set()).add(index)
+        # the scan is greedy, so a hit also stands for the anchors it starts with
+        self.anchors = {
+            literal: frozenset().union(*(indices
+                                         for prefix, indices in literals.items()
+                                         if literal.startswith(prefix)))
+            for literal in literals
+        }
+        self.scanner = re.compile(
+            '(?=(' + _trie_pattern(literals) + '))') if literals else None
+        self.always = frozenset(
+            index for index, (name, check, args) in enumerate(checks)
+            if not getattr(check, 'anchors', ()))
+        self.plans = {frozenset(): self.plan(self.always)}
+        if self.scanner is None:
+            self.plans[frozenset()] = self.plan(range(len(checks)))
+
+    def __iter__(self):
+        return iter(self.checks)
+
+    def __getstate__(self):
+        # checks are pickled by name, so that a compiled engine loads whether
+        # this module runs as a script or was imported
+        state = dict(self.__dict__)
+        state['checks'] = [name for name, check, args in self.checks]
+        return state
+
+    def __setstate__(self, state):
+        checks = {check.__name__: (check, args)
+                  for kind in _checks
+                  for check, (codes, args) in _checks[kind].items()}
+        state['checks'] = [(name,) + checks[name] for name in state['checks']]
+        self.__dict__.update(state)
+
+    def __len__(self):
+        return len(self.checks)
+
+    def plan(self, indices):
+        """Indices of the checks to run, in registration order"""
+        return tuple(sorted(indices))
+
+    def bind(self, checker):
+        """Returns (rule, check) pairs in registration order, where rule is
+        the check as a function of (line, checker), every argument but the
+        PER_LINE ones being read from the checker now rather than on each
+        line"""
+        return tuple((_bind(check, args[1:], checker), check)
+                     for name, check, args in self.checks)
+
+    def select(self, line):
+        """Returns the indices of the checks that can fire on line"""
+        if self.scanner is None:
+            return self.plans[frozenset()]
+        hits = frozenset(self.scanner.findall(line))
+        plan = self.plans.get(hits)
+        if plan is None:
+            plan = self.plan(self.always.union(
+                *(self.anchors[literal] for literal in hits)))
+            self.plans[hits] = plan
+        return plan
+
+    # with more anchors than this in a file, one scan per line beats looking
+    # for each of them in turn
+    prefilter_limit = 8
+
+    def prefilter(self, source):
+        """Returns select for the lines of one file, given all of its source.
+
+        Only the anchors found somewhere in source are looked for on each
+        line, so a file without any runs the unanchored checks alone and never
+        scans its lines. The code of a line only spells anchors its source
+        does, so every line gets the same plan as from select."""
+        if self.scanner is None:
+            return self.select
+        found = tuple(itertools.islice(
+            (literal for literal in self.anchors if literal in source),
+            self.prefilter_limit + 1))
+        if len(found) > self.prefilter_limit:
+            return self.select
+        always = self.plans[frozenset()]
+        if not found:
+            return lambda line: always
+
+        plans = self.plans
+
+        def _select(line):
+            hits = [literal for literal in found if literal in line]
+            if not hits:
+                return always
+            key = frozenset(hits)
+            plan = plans.get(key)
+            if plan is None:
+                # a hit also stands for the anchors it starts with, so this
+                # is the plan select finds for the longest hits alone
+                plan = plans[key] = self.plan(self.always.union(
+                    *(self.anchors[literal] for literal in hits)))
+            return plan
+        return _select
+
+
+# Rule Configuration
+# Rules the checker applies while tracking indentation and blocks rather
+# than as checks, by the name a rule configuration gives them
+LAYOUT_CHECKS = {
+    'check_under_indentation': 'Under Indentation',
+    'check_over_indentation': 'Over Indentation',
+    'check_blank_lines_between_methods': 'Blank Lines Between Methods',
+}
+
+
+class RuleSet:
+    """A rule configuration file compiled into what the checker runs: rule
+    engines holding only the checks it enables, the layout rules it turns
+    off, its thresholds and the short names it allows (see load_rules)"""
+
+    def __init__(self, digest, checks, allowed_names=ALLOWED_NAMES,
+                 max_line_length=None, tabsize=None, disabled=frozenset()):
+        self.digest = digest
+        self.checks = checks
+        self.allowed_names = allowed_names
+        self.max_line_length = max_line_length
+        self.tabsize = tabsize
+        # categories of LAYOUT_CHECKS that are not reported
+        self.disabled = disabled
+
+    def __repr__(self):
+        # stands for the rule set in result cache keys
+        return f'RuleSet({self.digest!r})'
+
+    def __getstate__(self):
+        # plain values only, see RuleEngine.__getstate__
+        state = dict(self.__dict__)
+        state['checks'] = {kind: engine.__getstate__()
+                           for kind, engine in self.checks.items()}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.checks = {}
+        for kind, engine_state in state['checks'].items():
+            engine = self.checks[kind] = RuleEngine.__new__(RuleEngine)
+            engine.__setstate__(engine_state)
+
+    @classmethod
+    def from_state(cls, state):
+        rules = cls.__new__(cls)
+        rules.__setstate__(state)
+        return rules
+
+
+def compile_rules(text, digest=''):
+    """Compiles the text of a rule configuration file into a RuleSet.
+
+    [checks] enable and disable list checks by name (check_break or break),
+    including the layout rules in LAYOUT_CHECKS, [thresholds] sets max_line_length and tabsize ("2 spaces"), and each
+    entry of [names] lists the short names allowed for a type, replacing the
+    defaults for that type only."""
+    from configparser import Error, RawConfigParser
+    config = RawConfigParser()
+    config.optionxform = str  # type names are case sensitive
+    try:
+        config.read_string(text)
+    except Error as error:
+        sys.exit(f'Invalid rule configuration: {error}')
+    unknown = set(config.sections()) - {'checks', 'thresholds', 'names'}
+    if unknown:
+        sys.exit(f'Unknown rule configuration sections: {", ".join(sorted(unknown))}')
+
+    known = {check.__name__ for kind in _checks for check in _checks[kind]}
+    known.update(LAYOUT_CHECKS)
+
+    def _checks_named(option):
+        names = set()
+        for name in config.get('checks', option, fallback='').replace(',', ' ').split():
+            if not name.startswith('check_'):
+                name = 'check_' + name
+            if name not in known:
+                sys.exit(f'Unknown check in rule configuration: {name}')
+            names.add(name)
+        return names
+
+    enabled = (_checks_named('enable') or known) - _checks_named('disable')
+    checks = {
+        kind: RuleEngine([(check.__name__, check, args)
+                          for check, (codes, args) in _checks[kind].items()
+                          if check.__name__ in enabled])
+        for kind in ('visible', 'private')
+    }
+
+    try:
+        max_line_length = config.getint('thresholds', 'max_line_length',
+                                        fallback=None)
+    except ValueError:
+        sys.exit('max_line_length in rule configuration should be a number')
+    tabsize = config.get('thresholds', 'tabsize', fallback=None)
+
+    allowed_names = dict(ALLOWED_NAMES)
+    if config.has_section('names'):
+        for type, names in config.items('names'):
+            allowed_names[type] = frozenset(names.replace(',', ' ').split())
+    disabled = frozenset(category for name, category in LAYOUT_CHECKS.items()
+                         if name not in enabled)
+    return RuleSet(digest, checks, allowed_names, max_line_length, tabsize,
+                   disabled)
+
+
+_rule_sets = {}
+
+
+def load_rules(path):
+    """Returns the RuleSet of a rule configuration file.
+
+    Compiled rule sets are kept in __pycache__ next to the file, named after
+    a hash of its contents and of the rule set version, so a configuration
+    is only parsed and compiled again once either changes."""
+    import hashlib
+    import pickle
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data + rules_version().encode()).hexdigest()
+    if digest in _rule_sets:
+        return _rule_sets[digest]
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)),
+                             '__pycache__')
+    prefix = os.path.basename(path) + '.'
+    compiled = os.path.join(directory, f'{prefix}{digest[:16]}.pickle')
+    try:
+        with open(compiled, 'rb') as f:
+            rules = _rule_sets[digest] = RuleSet.from_state(pickle.load(f))
+            return rules
+    except Exception:
+        # missing, truncated or incompatible: compile it again
+        pass
+
+    rules = _rule_sets[digest] = compile_rules(data.decode('utf-8'), digest)
+    temp = f'{compiled}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(temp, 'wb') as f:
+            pickle.dump(rules.__getstate__(), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, compiled)
+        # drop the compiled copies of earlier versions of the file
+        for entry in os.scandir(directory):
+            if entry.name.startswith(prefix) and entry.name.endswith('.pickle') \
+                    and entry.path != compiled:
+                os.remove(entry.path)
+    except Exception:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+    return rules
 
 
 # Code Quality Checking
 class CSE142Checker:
     """Load a Java source file, tokenize it, check coding style."""
 
-    def __init__(self, filename, checks, mode, options=None, **kwargs):
+    def __init__(self, filename, checks, mode, options=None, lines=None,
+                 **kwargs):
         if options is None:
             options = CodeQualityChecker(kwargs).options
         else:
             assert not kwargs
-        self.check_file(filename)
+        if lines is None:
+            self.check_file(filename)
+            lines = readlines(filename)
+        else:
+            self.filename = filename
         self.indent_type = options["INDENT_TYPE"]
         self.max_line_length = options["MAX_LINE_LENGTH"]
         self.tab_size = options["TAB_SIZE"]
         self.verbose = options["VERBOSE"]
-        self.lines = readlines(filename)
+        rules = options.get("RULES")
+        self.allowed_names = ALLOWED_NAMES if rules is None \
+            else rules.allowed_names
+        # layout rules turned off by the rule configuration
+        self.disabled = frozenset() if rules is None else rules.disabled
+        self.lines = lines
         self.total_lines = len(self.lines)
         self.mode = mode
-        self.report = GenerateReport(
-            verbose=self.verbose, mode=self.mode, total=self.total_lines)
+        # per-file run state, handed to checks that ask for it
+        self.counts = Counter()
+        self.report = GenerateReport(verbose=self.verbose, mode=self.mode,
+                                     total=self.total_lines, counts=self.counts)
         self.report_error = self.report.error
         self.visible = checks['visible']
         self.private = checks['private']
-        self.single_comment = False
+        self.visible_rules = self.bind_rules(self.visible)
+        self.private_rules = self.bind_rules(self.private)
+        self.select_visible = self.visible.select
+        self.select_private = self.private.select
+        # lexer state: the current line holds nothing but comments, started
+        # inside a block comment, a block comment is open at its end
+        self.comment_only = False
+        self.continued = False
         self.multi_comment = False
-        self.indent_level = 0
+        self.text = ''
+        self.spans = ()
+        self.structure = Structure()
+        self.declaration = None
 
     def check_file(self, filename):
         """Checks valdity of input file"""
@@ -551,54 +1158,56 @@ class CSE142Checker:
         self.line_number += 1
         return line
 
+    @property
+    def indent_level(self):
+        """Number of blocks open"""
+        return len(self.structure.stack)
+
+    def lines_after(self):
+        """Number of lines after the current one"""
+        return self.total_lines - self.line_number
+
+    def next_line(self):
+        """The line after the current one"""
+        return self.lines[self.line_number]
+
+    def bind_rules(self, engine):
+        """Binds the checks of engine to this file"""
+        return engine.bind(self)
+
     def report_visible_results(self, line):
         """Reports check results for visible tests"""
-        self.line = line
-        for name, check, categories in self.visible:
-            result = self.run_checks(check, categories)
+        rules = self.visible_rules
+        for index in self.select_visible(line):
+            rule, check = rules[index]
+            result = rule(line, self)
             if result is not None:
                 (info, message) = result
-                self.report_error(self.line_number, info, message, check, line)
+                self.report_error(self.line_number, info, message, check,
+                                  self.text)
 
     def report_private_results(self, line):
         """Reports check results for private tests"""
-        self.line = line
-        for name, check, categories in self.private:
-            result = self.run_checks(check, categories)
+        rules = self.private_rules
+        for index in self.select_private(line):
+            rule, check = rules[index]
+            result = rule(line, self)
             if result is not None:
                 (info, message) = result
-                self.report_error(self.line_number, info, message, check, line)
-
-    def run_checks(self, check, categories):
-        """Runs all checks"""
-        arguments = [getattr(self, name) for name in categories][1:]
-        return check(self.line, *arguments)
+                self.report_error(self.line_number, info, message, check,
+                                  self.text)
 
     def handle_comments(self, line):
-        if line.strip().startswith('//'):
-            self.single_comment = True
-            return ''
-        elif '//' in line:
-            idx = line.index('//')
-            line = line[:idx].strip()
-
-        if not self.single_comment \
-                and not self.multi_comment and '/*' in line:
-            self.multi_comment = True
-            if line.find('*/') > line.find('/*'):
-                line = line[: line.find('/*')] + \
-                    line[line.find('*/') + 1:]
-                self.multi_comment = False
-            else:
-                line = line[: line.find('/*')]
-
-        if self.multi_comment and '*/' in line:
-            self.multi_comment = False
-            line = line[line.find('*/') + 2:]
-
-        return line
+        """Lexes line, returns its code with comments and literals masked"""
+        self.continued = self.multi_comment
+        code, self.text, self.spans, self.multi_comment = lex(
+            line, self.multi_comment)
+        self.comment_only = bool(self.spans) and self.spans[0][0] == 'comment' \
+            and not code.strip()
+        return code
 
     def display_results(self, line, mode):
+        self.declaration = _getDeclaration(line)
         self.report_visible_results(line)
         if mode == 'private':
             self.report_private_results(line)
@@ -631,103 +1240,534 @@ class CSE142Checker:
         return line.strip() == '' or '}' in line
 
     def handle_indentation(self, line):
-        if '}' in line:
-            self.indent_level -= 1
-
-        if self.indent_level == 1 and self.line_number < self.total_lines - 2:
-            if '}' in line:
-                if not self.blank(self.lines[self.line_number]):
-                    self.report_error(self.line_number,
-                                    'Blank Lines Between Methods', BANK['Blank Lines Between Methods'], None, line)
-
         indent = self.check_indentation(line)
-        if indent and not self.multi_comment:
-            if indent == 2:
-                self.report_error(self.line_number,
-                                  'Under Indentation', BANK['Under Indentation'], None, line)
-            else:  # indent is 1
+        closed = self.structure.update(self.line_number, line)
+
+        # a member of the top level class ends here
+        if closed == 1 and self.lines_after() > 2:
+            if not self.blank(self.next_line()) and \
+                    'Blank Lines Between Methods' not in self.disabled:
                 self.report_error(self.line_number,
-                                  'Over Indentation', BANK['Over Indentation'], None, line)
+                                  'Blank Lines Between Methods', BANK['Blank Lines Between Methods'], None, self.text)
 
-        if '{' in line:
-            self.indent_level += 1
+        # code following the end of a block comment has no indentation
+        if indent and not self.continued:
+            info = 'Under Indentation' if indent == 2 else 'Over Indentation'
+            if info not in self.disabled:
+                self.report_error(self.line_number, info, BANK[info], None,
+                                  self.text)
 
     def check_all(self, expected=None, mode='visible'):
         """ Run tests on file and return the the list of errors"""
         self.report.init_file(self.filename, expected)
+        # the whole file is at hand, so checks anchored on literals it never
+        # mentions are left out of the plans before the first line
+        source = ''.join(self.lines)
+        self.select_visible = self.visible.prefilter(source)
+        self.select_private = self.private.prefilter(source)
         self.line_number = 0
         line = self.readline()
         while line:
-            self.single_comment = False
-            line = self.handle_comments(line)
+            self.check_line(line, mode)
+            line = self.readline()
+
+        return self.report.present_file_results()
+
+    def check_line(self, line, mode):
+        """Run comment handling, indentation and all checks on one line"""
+        line = self.handle_comments(line)
+
+        self.handle_indentation(line)
+
+        if not self.comment_only:
+            self.display_results(line, mode)
+
+
+class StreamingChecker(CSE142Checker):
+    """Checks lines as they are read, holding only a small look-ahead buffer
+    (enough for the blank line check) instead of the whole file"""
 
-            self.handle_indentation(line)
+    lookahead = 3
 
-            if not self.single_comment and not self.multi_comment:
-                self.display_results(line, mode)
+    def __init__(self, filename, checks, mode, options, lines=None,
+                 summarize=False):
+        super().__init__(filename, checks, mode, options=options, lines=[])
+        self.structure = Structure(history=False)
+        if lines is None:
+            self.check_file(filename)
+            lines = iterlines(filename)
+        self.source = iter(lines)
+        self.buffer = deque(itertools.islice(self.source, self.lookahead))
+        self.pending = []
+        self.report.init_file(filename, None)
+        # the report only grows with the errors when a summary is wanted
+        self.report_error = self.summarize if summarize else self.record
 
+    def readline(self):
+        """Get the next line from the input stream."""
+        if not self.buffer:
+            return ''
+        line = self.buffer.popleft()
+        self.buffer.extend(itertools.islice(self.source, 1))
+        self.line_number += 1
+        return line
+
+    def lines_after(self):
+        """Number of lines after the current one, up to the look-ahead"""
+        return len(self.buffer)
+
+    def next_line(self):
+        """The line after the current one"""
+        return self.buffer[0]
+
+    def record(self, line_num, info, message, check, line):
+        """Holds an error until the current line is done"""
+        self.pending.append(Diagnostic(line_num, info, message, line))
+
+    def summarize(self, line_num, info, message, check, line):
+        """Holds an error until the current line is done, and adds it to the
+        report for the summary"""
+        self.report.error(line_num, info, message, check, line)
+        self.pending.append(Diagnostic(line_num, info, message, line))
+
+    def iter_diagnostics(self, mode):
+        """Yields each Diagnostic as soon as its line has been checked"""
+        self.line_number = 0
+        line = self.readline()
+        while line:
+            self.check_line(line, mode)
+            if self.pending:
+                yield from self.pending
+                self.pending = []
             line = self.readline()
 
+    def summary(self):
+        """Presents the errors found so far, as check_all does, when created
+        with summarize"""
+        self.report.total = self.line_number
         return self.report.present_file_results()
 
 
+class ProfilingChecker(CSE142Checker):
+    """Records how often each check runs, how long it takes and how often it
+    finds an error, along with comment and indentation handling"""
+
+    def __init__(self, *args, **kwargs):
+        self.profile = CheckProfile()
+        super().__init__(*args, **kwargs)
+        self.report.profile = self.profile
+
+    def bind_rules(self, engine):
+        return tuple((self.timed(check.__name__, rule), check)
+                     for rule, check in CSE142Checker.bind_rules(self, engine))
+
+    def timed(self, name, rule):
+        """Wraps a bound check to record its calls"""
+        add = self.profile.add
+
+        def _timed(line, checker):
+            start = time.perf_counter()
+            result = rule(line, checker)
+            add(name, time.perf_counter() - start, result is not None)
+            return result
+        return _timed
+
+    def handle_comments(self, line):
+        start = time.perf_counter()
+        code = CSE142Checker.handle_comments(self, line)
+        self.profile.add('handle_comments', time.perf_counter() - start,
+                         code != line)
+        return code
+
+    def handle_indentation(self, line):
+        errors = self.report.file_errors
+        start = time.perf_counter()
+        CSE142Checker.handle_indentation(self, line)
+        self.profile.add('handle_indentation', time.perf_counter() - start,
+                         self.report.file_errors != errors)
+
+
+class BoundaryChecker(CSE142Checker):
+    """Runs only what carries over from line to line: comments, open blocks
+    and the checks that count things across the file (those taking counts).
+    Finds the state each chunk of a split check starts from."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.structure = Structure(history=False)
+        rules = self.visible_rules
+        if self.mode == 'private':
+            rules += self.private_rules
+        self.stateful = [(rule, getattr(check, 'anchors', ()))
+                         for rule, check in rules
+                         if 'counts' in _get_parameters(check)]
+
+    def check_line(self, line, mode):
+        code = self.handle_comments(line)
+        self.structure.update(self.line_number, code)
+        if self.comment_only or not self.stateful:
+            return
+        if self.literals is not None:
+            for literal in self.literals:
+                if literal in code:
+                    break
+            else:
+                return
+        rules = [rule for rule, anchors in self.stateful
+                 if not anchors or any(anchor in code for anchor in anchors)]
+        if rules:
+            self.declaration = _getDeclaration(code)
+            for rule in rules:
+                rule(code, self)
+
+    def state(self):
+        """Everything a chunk starting at the next line needs, as for
+        IncrementalChecker"""
+        return (self.structure.state(), self.multi_comment, dict(self.counts))
+
+    def find_states(self, starts, mode):
+        """Returns the state before each line index in starts (ascending),
+        leaving counts as they are after the last line"""
+        # as in RuleEngine.prefilter, checks anchored on literals the file
+        # never mentions cannot fire, and the rest only on lines with one
+        source = ''.join(self.lines)
+        self.stateful = [(rule, anchors) for rule, anchors in self.stateful
+                         if not anchors or
+                         any(anchor in source for anchor in anchors)]
+        self.literals = None
+        if all(anchors for rule, anchors in self.stateful):
+            self.literals = tuple(anchor for rule, anchors in self.stateful
+                                  for anchor in anchors)
+        states = []
+        starts = iter(starts)
+        start = next(starts, None)
+        for index, line in enumerate(self.lines):
+            if index == start:
+                states.append(self.state())
+                start = next(starts, None)
+            self.line_number = index + 1
+            self.check_line(line, mode)
+        return states
+
+
+class ChunkChecker(CSE142Checker):
+    """Checks count lines of a file from line index first, starting in the
+    state BoundaryChecker found there. lines holds those lines and the one
+    after them, for the blank line check; errors are held as Diagnostics."""
+
+    def __init__(self, filename, checks, mode, options, lines, first, count,
+                 total, state):
+        super().__init__(filename, checks, mode, options=options, lines=lines)
+        self.first = first
+        self.count = count
+        self.total_lines = total
+        self.structure = Structure(history=False)
+        structure, self.multi_comment, counts = state
+        self.structure.restore(structure)
+        self.counts.update(counts)
+        self.diagnostics = []
+        self.report_error = self.record
+
+    def readline(self):
+        """Get the next line of the chunk."""
+        if self.line_number >= self.first + self.count:
+            return ''
+        line = self.lines[self.line_number - self.first]
+        self.line_number += 1
+        return line
+
+    def next_line(self):
+        """The line after the current one"""
+        return self.lines[self.line_number - self.first]
+
+    def record(self, line_num, info, message, check, line):
+        """Holds an error for the merged report"""
+        self.diagnostics.append(Diagnostic(line_num, info, message, line))
+
+    def check_chunk(self, mode):
+        """Checks the chunk, returns its Diagnostics in the order found"""
+        source = ''.join(self.lines)
+        self.select_visible = self.visible.prefilter(source)
+        self.select_private = self.private.prefilter(source)
+        self.line_number = self.first
+        line = self.readline()
+        while line:
+            self.check_line(line, mode)
+            line = self.readline()
+        return self.diagnostics
+
+
 # CSE142 Style Guide
 class CodeQualityChecker:
     """Guide defined for CSE 142"""
 
     def __init__(self, *args, **kwargs):
+        self.kwargs = dict(kwargs)
         self.checker_class = CSE142Checker
         self.verbose = kwargs.pop('verbose', False)
+        # a rule configuration file, or a RuleSet compiled from one
+        self.rules = kwargs.pop('rules', None)
+        if isinstance(self.rules, str):
+            self.rules = load_rules(self.rules)
         self.tab_size = 4
         self.indent_type = 'spaces'
-        tabsize = kwargs.pop('tabsize', None)
+        tabsize = kwargs.pop('tabsize', None) or \
+            (self.rules is not None and self.rules.tabsize)
         if tabsize:
             split = tabsize.split()
             if len(split) != 2:
                 sys.exit(
                     'Specify tabsize in the format: "indentsize spaces" or "indentsize tabs"')
-                self.tab_size = int(split[0])
-                self.indent_type = split[1]
-
-        self.max_line_length = kwargs.pop('max_line_length', 100)
+            self.tab_size = int(split[0])
+            self.indent_type = split[1]
+
+        self.max_line_length = kwargs.pop(
+            'max_line_length',
+            self.rules is not None and self.rules.max_line_length or 100)
+        # batch runs record their files here and skip them when unchanged
+        self.manifest = kwargs.pop('manifest', None)
+        # files of at least this many lines are checked in chunks spread
+        # across worker processes (see check_split)
+        self.split_lines = kwargs.pop('split_lines', None)
         self.mode = kwargs.pop('mode', 'visible')
         self.report = GenerateReport(verbose=self.verbose, mode=self.mode)
         self.debug = kwargs.pop('debug', False)
-        if (self.debug):
-            global DEBUG
-            DEBUG = True
-        self.checks = {
-            'visible': self.get_checks('visible'),
-            'private': self.get_checks('private'),
-        }
+        # timings are only meaningful for checks that actually ran, so
+        # profiling bypasses the result cache
+        self.profile = kwargs.pop('profile', False)
+        if self.profile:
+            self.checker_class = ProfilingChecker
+        cache_size = kwargs.pop('cache_size', 256)
+        cache_dir = kwargs.pop('cache_dir', None)
+        cache_max_bytes = kwargs.pop('cache_max_bytes', 64 * 1024 * 1024)
+        self.cache = ResultCache(cache_size, cache_dir, cache_max_bytes) \
+            if (cache_size or cache_dir) and not self.profile else None
+        if self.rules is not None:
+            self.checks = self.rules.checks
+        else:
+            self.checks = {
+                'visible': RuleEngine(self.get_checks('visible')),
+                'private': RuleEngine(self.get_checks('private')),
+            }
         self.options = {
             "MAX_LINE_LENGTH": self.max_line_length,
             "TAB_SIZE": self.tab_size,
             "VERBOSE": self.verbose,
-            "INDENT_TYPE": self.indent_type
+            "INDENT_TYPE": self.indent_type,
+            "RULES": self.rules
         }
 
     def run_tests(self, filename, expected=None):
         """Run all checks on a java source file"""
         if self.mode != 'web':
-            console.print(
+            get_console().print(
                 f'[bold]Checking [blue]{filename}[/blue][/bold]: \n')
 
+        result, report = self.check(filename, expected)
+        if self.verbose and self.mode != 'web' and self.cache is not None:
+            result += self.cache.get_statistics()
+        return result
+
+    def run_batch(self, target, workers=None, threads=False):
+        """Run all checks on every java source file in a directory or glob,
+        spread across a pool of worker processes (or threads of this one)"""
+        summary = BatchReport(verbose=self.verbose, mode=self.mode)
+        for filename, result, report, cached in self.iter_batch(
+                target, workers, threads):
+            if self.mode != 'web':
+                get_console().print(
+                    f'[bold]Checking [blue]{filename}[/blue][/bold]: \n')
+                get_console().print(result)
+            summary.add(filename, result, report, cached)
+        return summary
+
+    def iter_batch(self, target, workers=None, threads=False):
+        """Like run_batch, but yields (filename, result, report, cached) for
+        each file as it is done, printing nothing"""
+        filenames = find_java_files(target)
+        if not filenames:
+            return
+
+        manifest = None
+        if self.manifest and not self.profile:
+            manifest = BatchManifest(self.manifest, self.options, self.mode)
+            stored = {filename: manifest.get(filename)
+                      for filename in filenames}
+            pending = [filename for filename in filenames
+                       if stored[filename] is None]
+            if not pending:
+                for filename in filenames:
+                    yield (filename,) + stored[filename] + (True,)
+                manifest.save()
+                return
+        else:
+            pending = filenames
+
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        if threads:
+            executor = ThreadPoolExecutor(workers)
+            results = executor.map(self.check_named if manifest is None
+                                   else self.check_recorded, pending)
+        else:
+            executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                           initargs=(self.kwargs,))
+            results = executor.map(_run_worker if manifest is None
+                                   else _run_recorded, pending,
+                                   chunksize=max(1, len(pending) // (workers * 4)))
+        with executor:
+            if manifest is None:
+                yield from results
+                return
+            # in the order of filenames, stored results in between
+            for filename in filenames:
+                if stored[filename] is not None:
+                    yield (filename,) + stored[filename] + (True,)
+                    continue
+                filename, result, report, cached, stamp = next(results)
+                manifest.put(filename, stamp, result, report)
+                yield filename, result, report, cached
+        manifest.save()
+
+    def iter_diagnostics(self, target, workers=None):
+        """Yields (filename, diagnostics) for a java source file, checked in
+        bounded memory with each Diagnostic yielded as soon as it is found,
+        or for every file in a directory or glob as each one is done"""
+        if os.path.isdir(target) or any(char in target for char in '*?['):
+            for filename, result, report, cached in self.iter_batch(
+                    target, workers):
+                yield filename, report.iter_diagnostics()
+        else:
+            yield target, self.stream(target)
+
+    def stream(self, source, filename=None):
+        """Check a java source file, or any iterable of its lines, in bounded
+        memory, yielding each Diagnostic as soon as it is found"""
+        if isinstance(source, str):
+            filename, source = source, None
+        checker = StreamingChecker(filename or '<stream>', self.checks,
+                                   options=self.options, mode=self.mode,
+                                   lines=source)
+        return checker.iter_diagnostics(self.mode)
+
+    def stream_source(self, source, filename='<source>'):
+        """Check java source code held in memory (str or bytes) as it is
+        read, returns a StreamingChecker whose iter_diagnostics yields each
+        Diagnostic as soon as it is found and whose summary presents them
+        all, once the diagnostics are exhausted"""
+        if isinstance(source, (bytes, bytearray)):
+            lines = decodelines(source)
+        else:
+            lines = StringIO(source, newline=None)
+        return StreamingChecker(filename, self.checks, options=self.options,
+                                mode=self.mode, lines=lines, summarize=True)
+
+    def incremental(self, source, filename='<source>'):
+        """Check source held in memory, keeping what is needed to re-check
+        only the lines affected by later edits"""
+        return IncrementalChecker(self, source, filename)
+
+    def check_named(self, filename):
+        """Run all checks on a java source file, returns it with the results
+        and whether they came from the cache"""
+        return (filename,) + self.check_cached(filename)
+
+    def check_recorded(self, filename):
+        """Like check_named, also returning the (size, mtime, content hash)
+        of the bytes that were checked, for the batch manifest"""
+        import hashlib
+        with open(filename, 'rb') as f:
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            data = f.read()
+        result, report, cached = self.check_cached(filename,
+                                                   lines=decodelines(data))
+        return (filename, result, report, cached,
+                (len(data), mtime, hashlib.sha256(data).hexdigest()))
+
+    def check_source(self, source, filename='<source>', expected=None):
+        """Run all checks on java source code held in memory (str or bytes)"""
+        if isinstance(source, (bytes, bytearray)):
+            lines = decodelines(source)
+        else:
+            lines = StringIO(source, newline=None).readlines()
+        result, report = self.check(filename, expected, lines=lines)
+        return result
+
+    def check(self, filename, expected=None, lines=None):
+        """Run all checks on a java source file (or its already read lines)
+        without printing, returns the presented result and its GenerateReport"""
+        result, report, cached = self.check_cached(filename, expected, lines)
+        return result, report
+
+    def check_cached(self, filename, expected=None, lines=None):
+        """Like check, also returning whether the results came from the cache"""
         checker = self.checker_class(
-            filename, self.checks, options=self.options, mode=self.mode)
+            filename, self.checks, options=self.options, mode=self.mode,
+            lines=lines)
 
         if self.mode != 'visible' and self.mode != 'private' and self.mode != 'web':
             sys.exit(
                 'Create Checker with mode either visible, private or web')
 
-        result = checker.check_all(expected=expected, mode=self.mode)
+        if self.cache is not None:
+            key = self.cache.key(checker.lines, self.options, self.mode)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached + (True,)
 
-        if not result and self.mode != 'web':
-            return '\t😀👍 [red]L[/red][orange1]o[/orange1][yellow]o[/yellow]' + \
-                '[green]k[/green][blue]s[/blue] [purple]G[/purple][blue]o[/blue]' + \
-                '[green]o[/green][yellow]d[/yellow][orange1]![/orange1]\n'
+        if self.split_lines and checker.total_lines >= self.split_lines \
+                and self.checker_class is CSE142Checker:
+            result = self.check_split(checker, expected)
+        else:
+            result = checker.check_all(expected=expected, mode=self.mode)
 
-        return result
+        if not result and self.mode != 'web':
+            result = LOOKS_GOOD
+
+        if self.cache is not None:
+            self.cache.put(key, (result, checker.report))
+        return result, checker.report, False
+
+    # chunks per worker process, and the fewest lines worth a chunk
+    chunks_per_worker = 2
+    min_chunk_lines = 2000
+
+    def check_split(self, checker, expected=None, workers=None):
+        """Run all checks on the lines of checker split into chunks, checked
+        in parallel by worker processes, returns the presented result.
+
+        One sequential pass finds the comment, block and count state at the
+        start of every chunk; each chunk then runs every check from there.
+        Errors are merged in line order, so the report is the same as
+        check_all's."""
+        from concurrent.futures import ProcessPoolExecutor
+        lines = checker.lines
+        total = len(lines)
+        workers = workers or os.cpu_count() or 1
+        size = max(self.min_chunk_lines,
+                   -(-total // (workers * self.chunks_per_worker)))
+        starts = range(0, total, size)
+
+        boundary = BoundaryChecker(checker.filename, self.checks,
+                                   options=self.options, mode=self.mode,
+                                   lines=lines)
+        states = boundary.find_states(starts, self.mode)
+        chunks = [(checker.filename, lines[start:start + size + 1], start,
+                   min(size, total - start), total, state)
+                  for start, state in zip(starts, states)]
+
+        with ProcessPoolExecutor(min(workers, len(chunks)),
+                                 initializer=_init_worker,
+                                 initargs=(self.kwargs,)) as executor:
+            results = list(executor.map(_run_chunk, chunks))
+
+        checker.counts.update(boundary.counts)
+        report = checker.report
+        report.init_file(checker.filename, expected)
+        for diagnostics in results:
+            for line_num, info, message, line in diagnostics:
+                report.error(line_num, info, message, None, line)
+        return report.present_file_results()
 
     def get_checks(self, category):
         """Get all the checks for a category"""
@@ -738,20 +1778,134 @@ class CodeQualityChecker:
         return checks
 
 
+# Incremental Checking
+class IncrementalChecker:
+    """Checks a source once, then re-checks only what an edit can affect.
+
+    states[i] is the (structure, multi_comment, counts) state before line
+    i and diagnostics[i] the errors reported on it. An edit re-runs from the
+    line before it (its blank-line check peeks ahead) until the state after a
+    line past the edit equals the old snapshot again."""
+
+    initial = ((b'', ''), False, ())
+
+    def __init__(self, guide, source, filename='<source>'):
+        self.guide = guide
+        self.lines = StringIO(source, newline=None).readlines()
+        self.checker = guide.checker_class(
+            filename, guide.checks, options=guide.options, mode=guide.mode,
+            lines=self.lines)
+        self.checker.report_error = self.record
+        self.diagnostics = [None] * len(self.lines)
+        self.states = [self.initial] + [None] * len(self.lines)
+        self.current = None
+        self.run(0, 0, self.initial)
+
+    def record(self, line_num, info, message, check, line):
+        """Collects an error reported on the line being checked"""
+        self.current.append((info, message, line))
+
+    def state(self):
+        checker = self.checker
+        return (checker.structure.state(), checker.multi_comment,
+                tuple(sorted(checker.counts.items())))
+
+    def restore(self, state):
+        checker = self.checker
+        structure, checker.multi_comment, counts = state
+        checker.structure.restore(structure)
+        checker.counts.clear()
+        checker.counts.update(dict(counts))
+
+    def run(self, first, settled, state):
+        """Re-checks from line index first, starting in state; from line index
+        settled on, stops as soon as the state after a line matches its old
+        snapshot"""
+        checker = self.checker
+        checker.total_lines = len(self.lines)
+        self.restore(state)
+        for index in range(first, len(self.lines)):
+            checker.line_number = index + 1
+            self.current = []
+            checker.check_line(self.lines[index], self.guide.mode)
+            self.diagnostics[index] = self.current
+            state = self.state()
+            if index >= settled and self.states[index + 1] == state:
+                return index + 1 - first
+            self.states[index + 1] = state
+        return len(self.lines) - first
+
+    def update(self, start, end, text):
+        """Replaces lines [start, end) (0-based) with text and re-checks the
+        lines that can be affected, returns how many were re-checked"""
+        total = len(self.lines)
+        if not 0 <= start <= end <= total:
+            raise ValueError(f'Edit lines [{start}, {end}) are outside the '
+                             f'{total} lines of the source')
+        new_lines = StringIO(text, newline=None).readlines()
+        # lines are kept as the source would split them: only the last line
+        # of the file may lack its newline
+        if new_lines and end < total and not new_lines[-1].endswith('\n'):
+            new_lines[-1] += '\n'
+        if new_lines and start == total and total and \
+                not self.lines[-1].endswith('\n'):
+            start -= 1
+            new_lines.insert(0, self.lines[start] + '\n')
+        # the blank line check looks one line ahead and only runs on lines
+        # three or more from the end, so those lines may change too
+        first = max(0, min(start - 1,
+                           min(total, total - (end - start) + len(new_lines)) - 3))
+        state = self.states[first]
+        # keeps the old snapshot of the first line after the edit in place
+        new_states = [None] * (len(new_lines) - 1) + [self.states[end]] \
+            if new_lines else []
+
+        self.lines[start:end] = new_lines
+        self.diagnostics[start:end] = [None] * len(new_lines)
+        if new_lines:
+            self.states[start + 1:end + 1] = new_states
+        else:
+            del self.states[start:end]
+        self.states[0] = self.initial
+        return self.run(first, start + len(new_lines) - 1, state)
+
+    def results(self):
+        """Presents the current errors exactly like a full check would"""
+        guide = self.guide
+        report = GenerateReport(verbose=guide.verbose, mode=guide.mode,
+                                total=len(self.lines),
+                                counts=Counter(dict(self.states[-1][2])))
+        report.init_file(self.checker.filename, None)
+        for index, diagnostics in enumerate(self.diagnostics):
+            for info, message, line in diagnostics:
+                report.error(index + 1, info, message, None, line)
+        result = report.present_file_results()
+        if not result and guide.mode != 'web':
+            result = LOOKS_GOOD
+        return result
+
+
 # Reporting Code Quality Errors
 class GenerateReport:
-    """Collect the results of the checks"""
+    """Collect the results of the checks.
+
+    Categories are numbered in the order first seen; each keeps its message
+    once and the lines of its errors in an array of ints. The text of each
+    line with errors is kept once. Output is only built when the report is
+    presented, by the renderer for its mode."""
 
-    def __init__(self, verbose, mode, total=None):
+    def __init__(self, verbose, mode, total=None, counts=None):
         """Specific fields: total errors, errors by category
         and errors messages """
-        self.messages = {}
-        self.categories = {}
-        self.lines = {}
+        self.counts = counts if counts is not None else Counter()
+        self.ids = {}
+        self.texts = []
+        self.error_lines = []
         self.verbose = verbose
         self.total = total
         self.mode = mode
         self.lineContent = {}
+        self.profile = None
 
     def init_file(self, filename, expected):
         """Constructs a new file"""
@@ -759,132 +1913,1136 @@ class GenerateReport:
         self.expected = expected or 'Passed!'
         self.file_errors = 0
 
+    def get_state(self):
+        """The report as plain values, which unlike the report itself can be
+        read back by any copy of this module, whatever it is imported as"""
+        return (self.filename, self.expected, self.file_errors, self.verbose,
+                self.mode, self.total, dict(self.counts), list(self.ids),
+                list(self.texts), [lines.tolist() for lines in self.error_lines],
+                dict(self.lineContent))
+
+    @classmethod
+    def from_state(cls, state):
+        (filename, expected, file_errors, verbose, mode, total, counts, ids,
+         texts, error_lines, content) = state
+        report = cls(verbose, mode, total, Counter(counts))
+        report.init_file(filename, expected)
+        report.file_errors = file_errors
+        report.ids = {info: id for id, info in enumerate(ids)}
+        report.texts = list(texts)
+        report.error_lines = [array('i', lines) for lines in error_lines]
+        report.lineContent = dict(content)
+        return report
+
     def error(self, line_num, info, message, check, line):
         """Report an error with options"""
-        if info in self.categories:
-            self.categories[info] += 1
-            self.lines[info].append(line_num)
-        else:
-            self.categories[info] = 1
-            self.messages[info] = message
-            self.lines[info] = [line_num]
+        id = self.ids.get(info)
+        if id is None:
+            id = self.ids[info] = len(self.texts)
+            self.texts.append(message)
+            self.error_lines.append(array('i'))
+        self.error_lines[id].append(line_num)
 
         self.lineContent[line_num] = line
 
         self.file_errors += 1
 
+    def get_counts(self):
+        """Returns the error count of each category id"""
+        return [len(lines) for lines in self.error_lines]
+
+    @property
+    def categories(self):
+        """Error count of each category, in the order first seen"""
+        return dict(zip(self.ids, self.get_counts()))
+
+    @property
+    def messages(self):
+        """Message of each category"""
+        return dict(zip(self.ids, self.texts))
+
+    @property
+    def lines(self):
+        """Lines of the errors of each category"""
+        return {name: list(lines)
+                for name, lines in zip(self.ids, self.error_lines)}
+
     def get_count(self):
         """Returns the total count of all errors"""
-        return sum(self.categories[key] for key in self.messages)
+        return sum(map(len, self.error_lines))
 
     def get_statistics(self):
         """Report statics of all errors"""
         return [
-            f'Error {key} occured {self.categories[key]} times'
-            for key in self.messages
+            f'Error {key} occured {count} times'
+            for key, count in self.categories.items()
         ]
 
     def get_unique(self):
         """Report number of unique errors"""
-        return len(self.categories)
+        return len(self.ids)
+
+    def iter_diagnostics(self):
+        """Yields a Diagnostic for each error, by line, then as presented"""
+        names = list(self.ids)
+        errors = sorted(
+            (line_num, position, id)
+            for position, id in enumerate(self.get_order(self.get_counts()))
+            for line_num in self.error_lines[id])
+        for line_num, position, id in errors:
+            yield Diagnostic(line_num, names[id], self.texts[id],
+                             self.lineContent[line_num])
+
+    def get_order(self, counts):
+        """Category ids as presented: forbidden features first, then by
+        count, most frequent first"""
+        names = list(self.ids)
+        return sorted(range(len(names)), key=lambda id: (
+            not names[id].startswith('[FORBIDDEN]'), -counts[id]))
 
     def present_file_results(self):
         """Prints out errors in a ordered fashion"""
-        errors = ''
-        index = 1
-        forbidden = []
-        other = []
-        web_errors = []
-        for item in self.categories.items():
-            if item[0].startswith('[FORBIDDEN]'):
-                forbidden.append(item)
+        if self.mode == 'web':
+            return self.render_web()
+        return self.render_text()
+
+    def render(self, style):
+        """Presents the errors as rich markup, plain text or web rows"""
+        if style == 'web':
+            return self.render_web()
+        return self.render_text(markup=style != 'plain')
+
+    def render_text(self, markup=True):
+        """Presents the errors as text, with rich markup unless markup is
+        off"""
+        names = list(self.ids)
+        counts = self.get_counts()
+        errors = []
+        forbidden = 0
+        for index, id in enumerate(self.get_order(counts), 1):
+            category = names[id]
+            count = counts[id]
+            multiple = category.startswith(
+                ('Multiple console scanners', 'Multiple random objects'))
+            phrase = 'line' if count == 1 else 'lines'
+            linenum = '' if multiple else \
+                '{' + ', '.join(map(str, self.error_lines[id])) + '}'
+
+            color = 'yellow'
+            if category.startswith('[FORBIDDEN]'):
+                color = 'red'
+                forbidden += 1
+            if markup:
+                category = f'[bold {color}]{category}[/bold {color}]'
+            errors.append(f'{index}. {category} on {phrase} {linenum}')
+
+            if self.verbose:
+                if multiple:
+                    count = self.counts[names[id]]
+                message = self.texts[id] if markup \
+                    else _strip_markup(self.texts[id])
+                errors.append(f' [Total Count = {count}]\n'
+                              f'TA Note: {message}\n')
+            errors.append('\n')
+
+        if self.verbose and (errors or self.profile is not None):
+            errors.append('[bold blue]Statistics:[/bold blue] \n' if markup
+                          else 'Statistics: \n')
+            if self.total:
+                errors.append(f'Total Lines Checked: {self.total}\n')
+            errors.append(f'Total Errors: {self.get_count()}\n')
+            errors.append(f'Unique Errors: {self.get_unique()}\n')
+            if forbidden and markup:
+                errors.append(
+                    f'[red]Unique Forbidden Features:[/red] {forbidden}\n')
             else:
-                other.append(item)
-        forbidden.sort(key=lambda x: x[1], reverse=True)
-        other.sort(key=lambda x: x[1], reverse=True)
-        total = forbidden + other
-        for category, count in total:
-            formatted_categories = self.messages[category]
-            formatted_categories = re.sub(
-                '([\[]).*?([\]])', '', formatted_categories)
-            formatted_categories = re.sub(
-                '\\n', ' ', formatted_categories)
-            if self.mode == 'web':
-                for index, line in enumerate(self.lines[category]):
-                    web_errors.append([
-                        category, line, count, formatted_categories, self.lineContent[line]
-                    ])
+                errors.append(f'Unique Forbidden Features: {forbidden}\n')
+            if self.profile is not None:
+                errors.extend(self.profile.get_statistics(markup))
+        return ''.join(errors)
+
+    def render_web(self):
+        """Presents the errors as [category, line, count, message, content]
+        rows ordered by line"""
+        names = list(self.ids)
+        counts = self.get_counts()
+        content = self.lineContent
+        web_errors = []
+        for id in self.get_order(counts):
+            category = names[id]
+            count = counts[id]
+            message = _web_message(self.texts[id])
+            web_errors.extend([category, line_num, count, message,
+                               content[line_num]]
+                              for line_num in self.error_lines[id])
+        web_errors.sort(key=operator.itemgetter(1))
+        if self.profile is not None:
+            return {'errors': web_errors,
+                    'timings': self.profile.get_timings()}
+        return web_errors
 
-                continue
 
-            multiple_scanners = category.startswith(
-                'Multiple console scanners')
-            multiple_random = category.startswith('Multiple random objects')
+@functools.lru_cache(maxsize=None)
+def _strip_markup(message):
+    """A BANK message without its rich markup"""
+    return MARKUP.sub('', message)
 
-            phrase = 'line' if len(self.lines[category]) == 1 else 'lines'
 
-            linenum = str(self.lines[category]).replace(
-                '[', '{').replace(']', '}')
+@functools.lru_cache(maxsize=None)
+def _web_message(message):
+    """A BANK message without its rich markup, on one line"""
+    return _strip_markup(message).replace('\n', ' ')
 
-            if multiple_scanners or multiple_random:
-                linenum = ''
 
-            if category.startswith('[FORBIDDEN]'):
-                s = f"{index}. [bold red]{category}[/bold red] on " + \
-                    f"{phrase} {linenum}"
-            else:
-                s = f"{index}. [bold yellow]{category}[/bold yellow] on " + \
-                    f"{phrase} {linenum}"
+class BatchReport:
+    """Collect the results of a batch of files"""
+
+    def __init__(self, verbose, mode):
+        self.verbose = verbose
+        self.mode = mode
+        self.results = {}
+        self.reports = {}
+        self.categories = {}
+        self.files = {}
+        self.cache_hits = 0
+
+    def add(self, filename, result, report, cached=False):
+        """Adds the GenerateReport of one checked file"""
+        self.cache_hits += cached
+        self.results[filename] = result
+        self.reports[filename] = report
+        for category, count in report.categories.items():
+            self.categories[category] = self.categories.get(category, 0) + count
+            self.files[category] = self.files.get(category, 0) + 1
 
-            errors = ''.join([errors, s])
+    def get_count(self):
+        """Returns the total count of all errors"""
+        return sum(self.categories.values())
+
+    def get_passed(self):
+        """Returns the number of files without errors"""
+        return sum(1 for report in self.reports.values()
+                   if not report.categories)
 
+    def present_summary(self):
+        """Summarises errors across all files, most frequent first"""
+        if self.mode == 'web':
+            summary = {
+                'files': self.results,
+                'categories': [[category, count, self.files[category]]
+                               for category, count in self.get_categories()],
+            }
             if self.verbose:
-                if multiple_scanners:
-                    count = NUM_CONSOLE_SCANNER
-                elif multiple_random:
-                    count = NUM_RANDOM
-                errors = ''.join(
-                    [errors, f' [Total Count = {count}]\n'])
-                message = f"TA Note: {self.messages[category]}\n"
-                errors = ''.join([errors, message])
-            errors += '\n'
-            index += 1
-
-        if self.verbose and errors:
-            errors += '[bold blue]Statistics:[/bold blue] \n'
-            if self.total:
-                errors = ''.join(
-                    [errors, f'Total Lines Checked: {self.total}\n'])
-            errors = ''.join([errors, f'Total Errors: {self.get_count()}\n'])
-            errors = ''.join(
-                [errors, f'Unique Errors: {self.get_unique()}\n'])
-
-            if len(forbidden) == 0:
-                errors = ''.join(
-                    [errors, f'Unique Forbidden Features: {len(forbidden)}\n'])
+                summary['cache'] = {'hits': self.cache_hits,
+                                    'misses': len(self.reports) - self.cache_hits}
+            return summary
+
+        summary = '[bold blue]Summary:[/bold blue] \n'
+        summary += f'Files Checked: {len(self.reports)}\n'
+        summary += f'Files Passed: {self.get_passed()}\n'
+        summary += f'Total Errors: {self.get_count()}\n'
+        if self.verbose:
+            summary += f'Cache Hits: {self.cache_hits}\n'
+            summary += f'Cache Misses: {len(self.reports) - self.cache_hits}\n'
+        for index, (category, count) in enumerate(self.get_categories(), 1):
+            color = 'red' if category.startswith('[FORBIDDEN]') else 'yellow'
+            phrase = 'file' if self.files[category] == 1 else 'files'
+            summary += f'{index}. [bold {color}]{category}[/bold {color}] ' + \
+                f'{count} times in {self.files[category]} {phrase}\n'
+        return summary
+
+    def get_categories(self):
+        """Returns (category, count) pairs, most frequent first"""
+        return sorted(self.categories.items(),
+                      key=lambda x: x[1], reverse=True)
+
+
+class CheckProfile:
+    """Call count, hit count, total and max wall time of each check"""
+
+    def __init__(self):
+        self.stats = {}
+
+    def add(self, name, elapsed, hit):
+        """Records one call of the check name"""
+        stats = self.stats.get(name)
+        if stats is None:
+            self.stats[name] = [1, int(hit), elapsed, elapsed]
+            return
+        stats[0] += 1
+        stats[1] += hit
+        stats[2] += elapsed
+        if elapsed > stats[3]:
+            stats[3] = elapsed
+
+    def get_timings(self):
+        """Returns {name: {calls, hits, total_ms, max_ms}}, slowest first"""
+        return {
+            name: {'calls': calls, 'hits': hits,
+                   'total_ms': round(total * 1000, 3),
+                   'max_ms': round(longest * 1000, 3)}
+            for name, (calls, hits, total, longest) in
+            sorted(self.stats.items(), key=lambda x: x[1][2], reverse=True)
+        }
+
+    def get_statistics(self, markup=True):
+        """Report the timings of all checks"""
+        return ['[bold blue]Check Timings:[/bold blue] \n' if markup
+                else 'Check Timings: \n'] + [
+            f'{name}: {stats["calls"]} calls, {stats["hits"]} hits, '
+            f'{stats["total_ms"]:.3f} ms total, {stats["max_ms"]:.3f} ms max\n'
+            for name, stats in self.get_timings().items()
+        ]
+
+
+# Rule Statistics
+class RuleStatistics:
+    """Errors of many checked files (across runs, students and assignments)
+    for class-wide queries.
+
+    Kept in columns rather than as reports: each row is one file and one
+    category with errors in it, with its rule (category id, one byte), file
+    (file id) and count. lines holds the line of every error, row by row.
+    Files are numbered as added; the rows and lines of file f start at
+    file_rows[f] and file_lines[f], and file_labels holds its student and
+    assignment ids. tally counts the files with each (assignment, rule,
+    count), which answers frequencies and histograms per file outright, and
+    rule_rows[rule] lists the rows of each rule, so that other queries only
+    read the rows they need."""
+
+    LABELS = ('student', 'assignment')
+    UNITS = ('file',) + LABELS
+
+    def __init__(self):
+        self.categories = []
+        self.category_ids = {}
+        self.rule = bytearray()
+        self.file = array('I')
+        self.count = array('I')
+        self.lines = array('i')
+        self.filenames = []
+        self.file_rows = array('I')
+        self.file_lines = array('I')
+        self.file_errors = array('I')
+        self.labels = {label: [] for label in self.LABELS}
+        self.label_ids = {label: {} for label in self.LABELS}
+        self.file_labels = {label: array('I') for label in self.LABELS}
+        self.tally = Counter()
+        self.rule_rows = []
+        # row ranges and files of each assignment, until a file is added
+        self.ranges_of = {}
+        self.files_of = {}
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def label_id(self, label, value):
+        """Id of a student or assignment, numbered as first seen"""
+        ids = self.label_ids[label]
+        id = ids.get(value)
+        if id is None:
+            id = ids[value] = len(self.labels[label])
+            self.labels[label].append(value)
+        return id
+
+    def add(self, filename, report, student=None, assignment=None):
+        """Adds the errors of one file's GenerateReport; the student defaults
+        to the file itself"""
+        file = len(self.filenames)
+        assignment = self.label_id('assignment', assignment)
+        self.filenames.append(filename)
+        self.file_rows.append(len(self.rule))
+        self.file_lines.append(len(self.lines))
+        self.file_errors.append(report.get_count())
+        self.file_labels['student'].append(self.label_id(
+            'student', filename if student is None else student))
+        self.file_labels['assignment'].append(assignment)
+        for category, lines in zip(report.ids, report.error_lines):
+            if not lines:
+                continue
+            rule = self.category_ids.get(category)
+            if rule is None:
+                if len(self.categories) == 256:
+                    raise ValueError('RuleStatistics holds at most 256 categories')
+                rule = self.category_ids[category] = len(self.categories)
+                self.categories.append(category)
+                self.rule_rows.append(array('I'))
+            self.rule_rows[rule].append(len(self.rule))
+            self.rule.append(rule)
+            self.file.append(file)
+            self.count.append(len(lines))
+            self.lines.extend(lines)
+            self.tally[assignment, rule, len(lines)] += 1
+        self.ranges_of.clear()
+        self.files_of.clear()
+
+    def add_batch(self, summary, assignment=None, student=None):
+        """Adds every file of a BatchReport; student, if given, maps a file
+        name to its student"""
+        for filename, report in summary.reports.items():
+            self.add(filename, report, student and student(filename),
+                     assignment)
+
+    def discard(self, assignment):
+        """Removes the files of an assignment, e.g. before checking it again"""
+        id = self.label_ids['assignment'].get(assignment)
+        if id is None:
+            return
+        old = self.__dict__.copy()
+        old_labels = old['file_labels']
+        self.__init__()
+        self.categories = old['categories']
+        self.category_ids = old['category_ids']
+        self.labels = old['labels']
+        self.label_ids = old['label_ids']
+        self.tally = Counter({key: files for key, files in old['tally'].items()
+                              if key[0] != id})
+        rows = old['file_rows'].tolist() + [len(old['rule'])]
+        lines = old['file_lines'].tolist() + [len(old['lines'])]
+        for file, filename in enumerate(old['filenames']):
+            if old_labels['assignment'][file] == id:
+                continue
+            start, end = rows[file], rows[file + 1]
+            self.file_rows.append(len(self.rule))
+            self.file_lines.append(len(self.lines))
+            self.rule += old['rule'][start:end]
+            self.file.extend(array('I', [len(self.filenames)]) * (end - start))
+            self.count += old['count'][start:end]
+            self.lines += old['lines'][lines[file]:lines[file + 1]]
+            self.file_errors.append(old['file_errors'][file])
+            for label in self.LABELS:
+                self.file_labels[label].append(old_labels[label][file])
+            self.filenames.append(filename)
+        self.rule_rows = [array('I') for category in self.categories]
+        for row, rule in enumerate(self.rule):
+            self.rule_rows[rule].append(row)
+
+    def files(self, assignment=None):
+        """Ids of the files of assignment (of every assignment if None)"""
+        if assignment is None:
+            return range(len(self.filenames))
+        files = self.files_of.get(assignment)
+        if files is None:
+            id = self.label_ids['assignment'].get(assignment)
+            labels = self.file_labels['assignment']
+            files = self.files_of[assignment] = [
+                file for file in range(len(self.filenames))
+                if labels[file] == id]
+        return files
+
+    def ranges(self, assignment=None):
+        """(start, end) row ranges holding the files of assignment"""
+        if assignment is None:
+            return ((0, len(self.rule)),)
+        ranges = self.ranges_of.get(assignment)
+        if ranges is None:
+            ranges = self.ranges_of[assignment] = []
+            rows = self.file_rows.tolist() + [len(self.rule)]
+            for file in self.files(assignment):
+                start, end = rows[file], rows[file + 1]
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+        return ranges
+
+    def summary(self, assignment=None):
+        """Number of files with each (rule, count) among the files of
+        assignment"""
+        id = None if assignment is None \
+            else self.label_ids['assignment'].get(assignment, -1)
+        summary = Counter()
+        for (label, rule, count), files in self.tally.items():
+            if id is None or label == id:
+                summary[rule, count] += files
+        return summary
+
+    def unit_labels(self, per):
+        """Unit id of each file when counting per file, student or
+        assignment; None per file"""
+        if per not in self.UNITS:
+            raise ValueError(f'per should be one of {", ".join(self.UNITS)}')
+        return None if per == 'file' else self.file_labels[per]
+
+    def units(self, per, assignment=None):
+        """Ids of the files, students or assignments holding the files of
+        assignment"""
+        labels = self.unit_labels(per)
+        files = self.files(assignment)
+        if labels is None:
+            return files
+        return set(map(labels.__getitem__, files))
+
+    def unit_name(self, per, id):
+        return self.filenames[id] if per == 'file' else self.labels[per][id]
+
+    def errors_per_unit(self, per, category=None, assignment=None):
+        """Errors (of category, or of any) of each unit with errors"""
+        labels = self.unit_labels(per)
+        if category is None:
+            files = self.files(assignment)
+            counts = list(map(self.file_errors.__getitem__, files))
+            files = list(itertools.compress(files, counts))
+            counts = [count for count in counts if count]
+        else:
+            rule = self.category_ids.get(category)
+            if rule is None:
+                return Counter()
+            rows = self.rule_rows[rule]
+            if assignment is not None:
+                rows = [row for start, end in self.ranges(assignment)
+                        for row in rows[bisect.bisect_left(rows, start):
+                                        bisect.bisect_left(rows, end)]]
+            files = list(map(self.file.__getitem__, rows))
+            counts = list(map(self.count.__getitem__, rows))
+        if labels is None:
+            # at most one row per file and category
+            return Counter(dict(zip(files, counts)))
+        errors = {}
+        get = errors.get
+        for unit, count in zip(map(labels.__getitem__, files), counts):
+            errors[unit] = get(unit, 0) + count
+        return Counter(errors)
+
+    def frequency(self, assignment=None):
+        """Returns (category, errors, files) for each category found, most
+        errors first"""
+        errors = Counter()
+        files = Counter()
+        for (rule, count), number in self.summary(assignment).items():
+            errors[rule] += count * number
+            files[rule] += number
+        return [(self.categories[rule], count, files[rule])
+                for rule, count in errors.most_common()]
+
+    def histogram(self, category=None, per='file', assignment=None):
+        """Returns (errors, units) pairs: how many files, students or
+        assignments have each number of errors (of category, or of any),
+        counting those without any"""
+        units = self.units(per, assignment)
+        if category is not None and per == 'file':
+            rule = self.category_ids.get(category)
+            histogram = Counter({count: files for (id, count), files
+                                 in self.summary(assignment).items()
+                                 if id == rule})
+        else:
+            histogram = Counter(self.errors_per_unit(
+                per, category, assignment).values())
+        without = len(units) - sum(histogram.values())
+        if without:
+            histogram[0] = without
+        return sorted(histogram.items())
+
+    def top(self, n=10, category=None, per='file', assignment=None):
+        """Returns the n files, students or assignments with the most errors
+        (of category, or of any) as (name, errors) pairs"""
+        errors = self.errors_per_unit(per, category, assignment)
+        return [(self.unit_name(per, id), count)
+                for id, count in errors.most_common(n)]
+
+    def get_lines(self, filename, category):
+        """Lines of the errors of category in (the first added) filename"""
+        file = self.filenames.index(filename)
+        rule = self.category_ids.get(category)
+        rows = self.file_rows.tolist() + [len(self.rule)]
+        line = self.file_lines[file]
+        for row in range(rows[file], rows[file + 1]):
+            if self.rule[row] == rule:
+                return self.lines[line:line + self.count[row]].tolist()
+            line += self.count[row]
+        return []
+
+    def save(self, path):
+        """Writes the columns to path"""
+        import pickle
+        state = {name: value.tobytes() if isinstance(value, array) else value
+                 for name, value in self.__dict__.items()
+                 if name not in ('file_labels', 'ranges_of', 'files_of')}
+        state['file_labels'] = {label: ids.tobytes()
+                                for label, ids in self.file_labels.items()}
+        state['rule_rows'] = [rows.tobytes() for rows in self.rule_rows]
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads columns written by save"""
+        import pickle
+        statistics = cls()
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        for name, value in state.items():
+            current = getattr(statistics, name)
+            if isinstance(current, array):
+                current.frombytes(value)
+            elif name == 'file_labels':
+                for label, ids in value.items():
+                    current[label].frombytes(ids)
+            elif name == 'rule_rows':
+                for rows in value:
+                    current.append(array('I'))
+                    current[-1].frombytes(rows)
             else:
-                errors = ''.join(
-                    [errors, f'[red]Unique Forbidden Features:[/red] {len(forbidden)}\n'])
-        if self.mode == 'web':
-            return sorted(web_errors, key=lambda x: x[1])
-        return errors
+                setattr(statistics, name, value)
+        return statistics
+
+
+# Result Caching
+@functools.lru_cache(maxsize=None)
+def rules_version():
+    """Fingerprint of the rule set: any change to this module invalidates
+    cached results"""
+    import hashlib
+    try:
+        with open(__file__, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (NameError, OSError):
+        return ''
+
+
+def options_fingerprint(options, mode):
+    """Everything besides the source that decides a result"""
+    return repr((sorted(options.items()), mode, rules_version()))
+
+
+class ResultCache:
+    """Check results keyed by a hash of the source, the checker options and
+    the rule set version. An in-process LRU tier sits in front of an optional
+    on-disk tier that is shared between processes and bounded in size."""
+
+    # a full disk tier is evicted down to this fraction of max_bytes, so the
+    # directory is only rescanned once every so many writes
+    low_water = 0.9
+
+    def __init__(self, maxsize=256, directory=None, max_bytes=64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.disk_bytes = sum(entry.stat().st_size
+                                  for entry in os.scandir(directory)
+                                  if entry.name.endswith('.pickle'))
+
+    def key(self, lines, options, mode):
+        """Content address of a check of lines"""
+        import hashlib
+        digest = hashlib.sha256(options_fingerprint(options, mode).encode())
+        for line in lines:
+            digest.update(line.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached value for key, or None"""
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self.read(key)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += 1
+                self.remember(key, value)
+        return value
+
+    def put(self, key, value):
+        """Caches value under key in both tiers"""
+        with self.lock:
+            self.remember(key, value)
+        self.write(key, value)
+
+    def remember(self, key, value):
+        """Adds to the LRU tier, evicting the least recently used entries"""
+        if not self.maxsize:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def read(self, key):
+        """Loads the (result, report) of key from the disk tier, marking it
+        as recently used"""
+        if self.directory is None:
+            return None
+        import pickle
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                result, state = pickle.load(f)
+            value = (result, GenerateReport.from_state(state))
+            os.utime(path)
+        except Exception:
+            # unreadable, truncated or from an incompatible version: a miss
+            return None
+        return value
+
+    def write(self, key, value):
+        """Stores the (result, report) of key in the disk tier as plain
+        values, evicting the oldest entries when the tier grows past
+        max_bytes"""
+        if self.directory is None:
+            return
+        import pickle
+        path = self.path(key)
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        result, report = value
+        try:
+            with open(temp, 'wb') as f:
+                pickle.dump((result, report.get_state()), f,
+                            pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp)
+            os.replace(temp, path)
+        except Exception:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return
+        with self.lock:
+            self.disk_bytes += size
+            if self.disk_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Removes least recently used disk entries until under the low
+        water mark"""
+        entries = sorted((entry for entry in os.scandir(self.directory)
+                          if entry.name.endswith('.pickle')),
+                         key=lambda entry: entry.stat().st_mtime)
+        self.disk_bytes = sum(entry.stat().st_size for entry in entries)
+        limit = self.max_bytes * self.low_water
+        for entry in entries:
+            if self.disk_bytes <= limit:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self.disk_bytes -= size
+            except OSError:
+                pass
+
+    def get_statistics(self):
+        """Report cache hits and misses"""
+        return f'Cache Hits: {self.hits} ({self.disk_hits} from disk)\n' + \
+            f'Cache Misses: {self.misses}\n'
+
+
+# Batch Checking
+_worker = None
+
+
+class BatchManifest:
+    """Size, mtime and content hash of each file of the last batch run over
+    a target, with its results, so the next run only checks what changed.
+
+    A file whose size and mtime are unchanged is reused without being read;
+    one that was only touched is read and hashed, and reused if its contents
+    match. The whole manifest is dropped when the options or the rule set
+    change. It is saved with the files of the latest run only, and not at
+    all when none of them changed."""
+
+    def __init__(self, path, options, mode):
+        self.path = path
+        self.fingerprint = options_fingerprint(options, mode)
+        self.entries = {}
+        self.seen = {}
+        self.changed = False
+        import pickle
+        try:
+            with open(path, 'rb') as f:
+                fingerprint, entries = pickle.load(f)
+        except Exception:
+            return
+        if fingerprint == self.fingerprint:
+            self.entries = entries
+
+    @staticmethod
+    def digest(filename):
+        import hashlib
+        with open(filename, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def get(self, filename):
+        """Returns the stored (result, report) of filename if it is
+        unchanged, or None"""
+        entry = self.entries.get(filename)
+        if entry is None:
+            return None
+        size, mtime, digest, result, state = entry
+        try:
+            stat = os.stat(filename)
+            if stat.st_size != size:
+                return None
+            if stat.st_mtime_ns != mtime:
+                if self.digest(filename) != digest:
+                    return None
+                entry = (size, stat.st_mtime_ns, digest, result, state)
+                self.changed = True
+            report = GenerateReport.from_state(state)
+        except Exception:
+            return None
+        self.seen[filename] = entry
+        return result, report
+
+    def put(self, filename, stamp, result, report):
+        """Records the results of a file checked in this run, with the
+        (size, mtime, content hash) of the bytes that were checked"""
+        self.seen[filename] = stamp + (result, report.get_state())
+        self.changed = True
+
+    def save(self):
+        """Writes the files of this run to the manifest"""
+        if not self.changed and self.seen.keys() == self.entries.keys():
+            return
+        import pickle
+        temp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temp, 'wb') as f:
+                pickle.dump((self.fingerprint, self.seen), f,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.path)
+        except Exception:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+
+def _init_worker(kwargs):
+    """Builds the checker (and its rule registry) once per worker process"""
+    global _worker
+    # the work is already spread across the pool, so workers never split
+    _worker = CodeQualityChecker(**dict(kwargs, split_lines=None))
+
+
+def _run_worker(filename):
+    """Checks one file in a worker process"""
+    return _worker.check_named(filename)
+
+
+def _run_recorded(filename):
+    """Checks one file of a batch with a manifest in a worker process"""
+    return _worker.check_recorded(filename)
+
+
+def _run_chunk(chunk):
+    """Checks one chunk of a split file in a worker process"""
+    filename, lines, first, count, total, state = chunk
+    checker = ChunkChecker(filename, _worker.checks, mode=_worker.mode,
+                           options=_worker.options, lines=lines, first=first,
+                           count=count, total=total, state=state)
+    return checker.check_chunk(_worker.mode)
 
 
 # Helper Functions
+def find_java_files(target):
+    """Expands a directory (recursively) or a glob into java source files"""
+    import glob
+    if os.path.isdir(target):
+        target = os.path.join(target, '**', '*.java')
+    return sorted(filename
+                  for filename in glob.glob(target, recursive=True)
+                  if filename.endswith('.java') and os.path.isfile(filename))
+
+
+def _latin_1_fallback(error):
+    """Decodes bytes that are not valid in the source's encoding as latin-1"""
+    return error.object[error.start:error.end].decode('latin-1'), error.end
+
+
+def opensource(f):
+    """A text stream of the java source in the binary file f, decoded as its
+    coding cookie or BOM says (latin-1 where that fails), with universal
+    newlines"""
+    import codecs
+    import tokenize
+    try:
+        codecs.lookup_error('java-source')
+    except LookupError:
+        codecs.register_error('java-source', _latin_1_fallback)
+    try:
+        (coding, lines) = tokenize.detect_encoding(f.readline)
+    except SyntaxError:
+        # Fall back if source encoding is improperly declared
+        coding = 'latin-1'
+    f.seek(0)
+    return TextIOWrapper(f, coding, errors='java-source', newline=None)
+
+
 def readlines(filename):
     """Read the source code."""
+    with open(filename, 'rb') as f:
+        return opensource(f).readlines()
+
+
+def iterlines(filename):
+    """Read the source code one line at a time."""
+    with open(filename, 'rb') as f:
+        yield from opensource(f)
+
+
+def decodelines(data):
+    """Decode source code held in memory."""
+    return opensource(BytesIO(data)).readlines()
+
+
+# In-memory Checking
+# checkers for the most recently used options, least recently used first;
+# options can come from clients (the web API's tabsize), so they are bounded
+_source_checkers = OrderedDict()
+_source_checkers_size = 16
+_source_checkers_lock = threading.Lock()
+
+
+def _source_checker(options):
+    """Returns a (reused) checker for options, defaulting to mode='web'"""
+    options = dict(options or {})
+    options.setdefault('mode', 'web')
+    key = tuple(sorted(options.items()))
+    with _source_checkers_lock:
+        checker = _source_checkers.get(key)
+        if checker is not None:
+            _source_checkers.move_to_end(key)
+            return checker
+    checker = CodeQualityChecker(**options)
+    with _source_checkers_lock:
+        _source_checkers[key] = checker
+        while len(_source_checkers) > _source_checkers_size:
+            _source_checkers.popitem(last=False)
+    return checker
+
+
+def check_source(text, options=None):
+    """Run all checks on java source text, without touching the filesystem.
+
+    options are CodeQualityChecker keyword arguments; in the default web mode
+    the result is a list of [category, line, count, message, content]."""
+    return _source_checker(options).check_source(text)
+
+
+def check_source_bytes(data, options=None):
+    """Like check_source, for undecoded source bytes"""
+    return _source_checker(options).check_source(bytes(data))
+
+
+def stream_source(text, options=None):
+    """Like check_source, returning a StreamingChecker to iterate"""
+    return _source_checker(options).stream_source(text)
+
+
+def incremental_source(text, options=None):
+    """Check java source text, returning an IncrementalChecker whose update
+    re-checks only the lines an edit affects"""
+    return _source_checker(options).incremental(text)
+
+
+# Machine-readable Output
+def rule_id(category):
+    """Stable identifier of an error category, e.g. forbidden-break"""
+    category = category.lower().replace('\\n', 'backslash n')
+    return '-'.join(re.findall('[a-z0-9]+', category))
+
+
+def get_level(category):
+    """SARIF level of an error category"""
+    return 'error' if category.startswith('[FORBIDDEN]') else 'warning'
+
+
+def diagnostic_record(filename, diagnostic):
+    """A Diagnostic of filename as a dict ready for JSON"""
+    return {
+        'file': filename,
+        'line': diagnostic.line,
+        'rule': rule_id(diagnostic.category),
+        'category': diagnostic.category,
+        'level': get_level(diagnostic.category),
+        'message': _web_message(diagnostic.message),
+        'content': diagnostic.content.rstrip('\r\n'),
+    }
+
+
+def iter_json_lines(results):
+    """Yields one line of JSON per diagnostic in (filename, diagnostics)
+    pairs, without holding more than one diagnostic"""
+    import json
+    for filename, diagnostics in results:
+        for diagnostic in diagnostics:
+            yield json.dumps(diagnostic_record(filename, diagnostic))
+
+
+def to_sarif(results):
+    """Returns a SARIF 2.1.0 log of (filename, diagnostics) pairs"""
+    from urllib.parse import quote
+    rules = []
+    indices = {}
+    sarif_results = []
+    for filename, diagnostics in results:
+        uri = quote(filename.replace(os.sep, '/'))
+        if os.path.isabs(filename):
+            uri = 'file://' + uri
+        for diagnostic in diagnostics:
+            category = diagnostic.category
+            if category not in indices:
+                indices[category] = len(rules)
+                rules.append({
+                    'id': rule_id(category),
+                    'name': category,
+                    'shortDescription': {'text': category},
+                    'fullDescription': {
+                        'text': _web_message(diagnostic.message)},
+                    'defaultConfiguration': {'level': get_level(category)},
+                })
+            sarif_results.append({
+                'ruleId': rule_id(category),
+                'ruleIndex': indices[category],
+                'level': get_level(category),
+                'message': {'text': _web_message(diagnostic.message)},
+                'locations': [{'physicalLocation': {
+                    'artifactLocation': {'uri': uri},
+                    'region': {
+                        'startLine': diagnostic.line,
+                        'snippet': {
+                            'text': diagnostic.content.rstrip('\r\n')},
+                    },
+                }}],
+            })
+    return {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'CSE 142 Code Quality Checker',
+                                'rules': rules}},
+            'results': sarif_results,
+        }],
+    }
+
+
+# Checker Daemon
+def default_socket():
+    """Path of the daemon's Unix socket, CHECKER_SOCKET if set"""
+    return os.environ.get('CHECKER_SOCKET') or os.path.join(
+        os.environ.get('TMPDIR', '/tmp'),
+        f'java-style-checker-{os.getuid()}.sock')
+
+
+def handle_request(request):
+    """Checks the file (path) or source of a client request with a warm
+    checker, returns the response sent back to the client"""
+    mode = request.get('mode', 'visible')
+    # loaded on every request, so that edits to the file take effect
+    rules = request.get('rules')
+    if rules:
+        rules = load_rules(rules)
+    checker = _source_checker({'mode': mode,
+                               'verbose': bool(request.get('verbose')),
+                               'debug': bool(request.get('debug')),
+                               'tabsize': request.get('tabsize'),
+                               'rules': rules})
+    filename = request.get('filename') or request.get('path')
+    if not isinstance(filename, str) or filename[-5:] != '.java':
+        return {'error': 'Files should be .java files'}
+    if request.get('source') is not None:
+        lines = StringIO(request['source'], newline=None).readlines()
+    else:
+        lines = readlines(request['path'])
+
+    result, report = checker.check(filename, lines=lines)
+    if mode == 'web':
+        return {'output': result}
+    if checker.verbose and checker.cache is not None:
+        result += checker.cache.get_statistics()
+    return {'output': _render_terminal(filename, result,
+                                       request.get('width') or 80,
+                                       bool(request.get('terminal')))}
+
+
+@functools.lru_cache(maxsize=64)
+def _render_terminal(filename, result, width, terminal):
+    """What main prints for a result, rendered by rich; unchanged files give
+    the same result, so re-checking them on save skips rendering too"""
+    from rich.console import Console
+    console = Console(file=StringIO(), width=width, force_terminal=terminal)
+    console.print()
+    console.rule('CSE 142 Code Quality Checker')
+    console.print(f'[bold]Checking [blue]{filename}[/blue][/bold]: \n')
+    console.print(result)
+    return console.file.getvalue()
+
+
+def serve(path=None):
+    """Runs the checker daemon on a Unix socket until interrupted, answering
+    one JSON request per connection (see style_checker_client.py)"""
+    import json
+    import signal
+    import socket
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                response = handle_request(json.loads(self.rfile.readline()))
+            except SystemExit as error:
+                response = {'error': str(error.code)}
+            except Exception as error:
+                response = {'error': f'{type(error).__name__}: {error}'}
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+    path = path or default_socket()
+    if os.path.lexists(path):
+        import stat
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            sys.exit(f'{path} exists and is not a socket, set CHECKER_SOCKET '
+                     'to another path')
+        with socket.socket(socket.AF_UNIX) as probe:
+            if probe.connect_ex(path) == 0:
+                sys.exit(f'A checker daemon is already listening on {path}')
+        os.unlink(path)
+
+    # warm up: the checkers, their regexes and rich are all loaded lazily
+    for mode in ('visible', 'private'):
+        handle_request({'mode': mode, 'filename': 'Warm.java',
+                        'source': 'public class Warm {\n}\n'})
+
+    umask = os.umask(0o177)
     try:
-        with open(filename, 'rb') as f:
-            (coding, lines) = tokenize.detect_encoding(f.readline)
-            f = TextIOWrapper(f, coding, line_buffering=True)
-            return [line.decode(coding) for line in lines] + f.readlines()
-    except (LookupError, SyntaxError, UnicodeError):
-        # Fall back if file encoding is improperly declared
-        with open(filename, encoding='latin-1') as f:
-            return f.readlines()
+        server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    finally:
+        os.umask(umask)
+    server.daemon_threads = True
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit())
+    print(f'Checker daemon listening on {path}')
+    try:
+        with server:
+            server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        os.unlink(path)
 
 
 # Annotation Bank
+LOOKS_GOOD = '\t😀👍 [red]L[/red][orange1]o[/orange1][yellow]o[/yellow]' + \
+    '[green]k[/green][blue]s[/blue] [purple]G[/purple][blue]o[/blue]' + \
+    '[green]o[/green][yellow]d[/yellow][orange1]![/orange1]\n'
+
 BANK = {
     'Long lines': 'Lines of code should ideally max out at 80 characters, \n' +
     'and should [italic]never[/italic] exceed 100 characters in length. Lines that \n' +
@@ -1006,16 +3164,16 @@ BANK = {
 # Error Handling
 def exit_on_error(exctype, value, tb):
     """Exits program on error"""
-    import os
+    import traceback
     if not DEBUG:
         fname = os.path.split(tb.tb_frame.f_code.co_filename)[1]
         obj = traceback.extract_tb(tb)
         line_num = obj[-1].lineno
         line = obj[-1].line
-        console.print(f"""\tGot a [bold blue]{exctype.__name__}[/bold blue] in file {fname} on line [bold blue]{line_num}[/bold blue]
+        get_console().print(f"""\tGot a [bold blue]{exctype.__name__}[/bold blue] in file {fname} on line [bold blue]{line_num}[/bold blue]
         because of line:""")
         print(f'\t\t{line}')
-        console.print(f"""
+        get_console().print(f"""
         (TA Note) This test probably broke :cry: [bold red]Post on the message board![/bold red]
         Terminating program...\n""")
         sys.exit()
@@ -1026,19 +3184,91 @@ def exit_on_error(exctype, value, tb):
 sys.excepthook = exit_on_error
 
 
-def main(filename, mode, verbose, debug, tabsize):
+def main(filename, mode, verbose, debug, tabsize, cache_dir=None,
+         profile=False, rules=None, split_lines=None):
+    global DEBUG
+    DEBUG = debug
     print()
     if mode != 'web':
-        console.rule('CSE 142 Code Quality Checker')
+        get_console().rule('CSE 142 Code Quality Checker')
     checker = CodeQualityChecker(
-        mode=mode, verbose=verbose, debug=debug, tabsize=tabsize)
+        mode=mode, verbose=verbose, debug=debug, tabsize=tabsize,
+        cache_dir=cache_dir, profile=profile, rules=rules,
+        split_lines=split_lines)
     tests = checker.run_tests(filename)
     if mode == 'web':
         return tests
     else:
-        console.print(tests)
+        get_console().print(tests)
+
+
+def batch_main(target, mode, verbose, debug, tabsize, workers=None,
+               cache_dir=None, profile=False, rules=None, statistics=None,
+               manifest=None):
+    global DEBUG
+    DEBUG = debug
+    print()
+    if mode != 'web':
+        get_console().rule('CSE 142 Code Quality Checker')
+    checker = CodeQualityChecker(
+        mode=mode, verbose=verbose, debug=debug, tabsize=tabsize,
+        cache_dir=cache_dir, profile=profile, rules=rules, manifest=manifest)
+    summary = checker.run_batch(target, workers=workers)
+    if statistics:
+        # the target is the assignment; checking it again replaces its files
+        stats = RuleStatistics.load(statistics) \
+            if os.path.exists(statistics) else RuleStatistics()
+        stats.discard(target)
+        stats.add_batch(summary, assignment=target)
+        stats.save(statistics)
+    if mode == 'web':
+        return summary.present_summary()
+    else:
+        get_console().rule('Summary')
+        get_console().print(summary.present_summary())
+
+
+def export_main(target, mode, output_format, tabsize=None, workers=None,
+                cache_dir=None, rules=None, manifest=None):
+    """Writes the diagnostics of a file, directory or glob to stdout as JSON
+    Lines (one object per diagnostic, as found) or as one SARIF log"""
+    checker = CodeQualityChecker(mode=mode, tabsize=tabsize,
+                                 cache_dir=cache_dir, rules=rules,
+                                 manifest=manifest)
+    results = checker.iter_diagnostics(target, workers=workers)
+    if output_format == 'sarif':
+        import json
+        json.dump(to_sarif(results), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for line in iter_json_lines(results):
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
 
 
 if __name__ == '__main__':
-    main(filename=sys.argv[1], mode=sys.argv[2],
-         verbose=bool(sys.argv[3]), debug=bool(sys.argv[4]), tabsize=None)
+    if sys.argv[1] == '--daemon':
+        serve(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif os.environ.get('CHECKER_FORMAT') in ('jsonl', 'sarif'):
+        export_main(target=sys.argv[1], mode=sys.argv[2],
+                    output_format=os.environ['CHECKER_FORMAT'],
+                    workers=int(sys.argv[5]) if len(sys.argv) > 5 else None,
+                    cache_dir=os.environ.get('CHECKER_CACHE_DIR'),
+                    rules=os.environ.get('CHECKER_RULES'),
+                    manifest=os.environ.get('CHECKER_MANIFEST'))
+    elif os.path.isdir(sys.argv[1]) or any(char in sys.argv[1] for char in '*?['):
+        batch_main(target=sys.argv[1], mode=sys.argv[2],
+                   verbose=bool(sys.argv[3]), debug=bool(sys.argv[4]), tabsize=None,
+                   workers=int(sys.argv[5]) if len(sys.argv) > 5 else None,
+                   cache_dir=os.environ.get('CHECKER_CACHE_DIR'),
+                   profile=bool(os.environ.get('CHECKER_PROFILE')),
+                   rules=os.environ.get('CHECKER_RULES'),
+                   statistics=os.environ.get('CHECKER_STATS'),
+                   manifest=os.environ.get('CHECKER_MANIFEST'))
+    else:
+        main(filename=sys.argv[1], mode=sys.argv[2],
+             verbose=bool(sys.argv[3]), debug=bool(sys.argv[4]), tabsize=None,
+             cache_dir=os.environ.get('CHECKER_CACHE_DIR'),
+             profile=bool(os.environ.get('CHECKER_PROFILE')),
+             rules=os.environ.get('CHECKER_RULES'),
+             split_lines=int(os.environ.get('CHECKER_SPLIT_LINES') or 0))
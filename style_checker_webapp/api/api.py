@@ -1,11 +1,19 @@
+import gzip
 import importlib
 import importlib.util
 import json
+import os
+import secrets
 import subprocess
 import sys
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 
 try:
-    from flask import Flask, request
+    from flask import Flask, Response, request
 except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", 'flask'])
 
@@ -29,6 +37,29 @@ checker = module_from_file(
 app = Flask(__name__)
 CORS(app)
 
+# Checks run in a bounded pool of worker processes. Requests beyond the
+# workers wait in a queue of QUEUE_SIZE; past that they get a 503.
+WORKERS = int(os.environ.get('CHECKER_WORKERS', os.cpu_count() or 1))
+QUEUE_SIZE = int(os.environ.get('CHECKER_QUEUE_SIZE', 4 * WORKERS))
+RETRY_AFTER = int(os.environ.get('CHECKER_RETRY_AFTER', 5))
+
+pool = ProcessPoolExecutor(WORKERS)
+slots = threading.BoundedSemaphore(WORKERS + QUEUE_SIZE)
+
+# Batches are limited to BATCH_FILES files and BATCH_BYTES of source, and
+# go to the pool BATCH_CHUNK files at a time
+BATCH_CHUNK = int(os.environ.get('CHECKER_BATCH_CHUNK', 16))
+BATCH_FILES = int(os.environ.get('CHECKER_BATCH_FILES', 2000))
+BATCH_BYTES = int(os.environ.get('CHECKER_BATCH_BYTES', 64 * 1024 * 1024))
+# uploads past this get a 413 before they are read; JSON escaping can make a
+# batch's body larger than its source
+app.config['MAX_CONTENT_LENGTH'] = 2 * BATCH_BYTES
+
+# Incremental checks of the files open in editors, least recently used first
+SESSIONS = int(os.environ.get('CHECKER_SESSIONS', 256))
+sessions = OrderedDict()
+sessions_lock = threading.Lock()
+
 
 class SetEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -37,13 +68,214 @@ class SetEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def run_check(code, options):
+    if isinstance(code, bytes):
+        return checker.check_source_bytes(code, options=options)
+    return checker.check_source(code, options=options)
+
+
+def run_chunk(codes, options):
+    return [run_check(code, options) for code in codes]
+
+
+def check_batch(codes, options):
+    """Results of codes, checked in chunks on the pool. The caller holds a
+    slot for the first chunk; every chunk in flight holds one and at most
+    one chunk per worker is in flight, so other requests wait behind no more
+    than a pool's worth of the batch and get a 503 once the slots are gone"""
+    size = max(1, min(BATCH_CHUNK, len(codes) // (4 * WORKERS)))
+    in_flight = threading.BoundedSemaphore(WORKERS)
+
+    def done(future):
+        slots.release()
+        in_flight.release()
+
+    futures = []
+    for first in range(0, len(codes), size):
+        in_flight.acquire()
+        if first:
+            slots.acquire()
+        try:
+            future = pool.submit(run_chunk, codes[first:first + size], options)
+        except BaseException:
+            done(None)
+            raise
+        future.add_done_callback(done)
+        futures.append(future)
+    return [result for future in futures for result in future.result()]
+
+
+def busy():
+    return ('The checker is busy, try again shortly', 503,
+            {'Retry-After': str(RETRY_AFTER)})
+
+
+def too_large():
+    return (f'Batches are limited to {BATCH_FILES} files and '
+            f'{BATCH_BYTES} bytes of source', 413)
+
+
+def batch_sources():
+    """(name, code) pairs of a batch, from a zip archive or JSON files"""
+    archive = request.files.get('archive')
+    if archive is not None or request.mimetype == 'application/zip':
+        data = archive.read() if archive is not None else request.get_data()
+        with zipfile.ZipFile(BytesIO(data)) as bundle:
+            members = [member for member in bundle.infolist()
+                       if not member.is_dir() and
+                       member.filename.endswith('.java') and
+                       not member.filename.startswith('__MACOSX/')]
+            if len(members) > BATCH_FILES or \
+                    sum(member.file_size for member in members) > BATCH_BYTES:
+                return None
+            return [(member.filename, bundle.read(member))
+                    for member in members]
+    files = request.json['files']
+    if isinstance(files, dict):
+        files = files.items()
+    else:
+        files = [(file['name'], file['code']) for file in files]
+    sources = [(str(name), str(code)) for name, code in files]
+    if len(sources) > BATCH_FILES or \
+            sum(len(code) for name, code in sources) > BATCH_BYTES:
+        return None
+    return sources
+
+
+def compressed(body):
+    """A JSON response, gzipped when the client accepts it"""
+    response = Response(body, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(body.encode(), 6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def event(name, data):
+    """One server-sent event"""
+    return f'event: {name}\ndata: {json.dumps(data, cls=SetEncoder)}\n\n'
+
+
+def get_options(content):
+    options = {'mode': 'web', 'verbose': True, 'debug': True,
+               'cache_dir': os.environ.get('CHECKER_CACHE_DIR')}
+    if content.get('tabsize'):
+        options['tabsize'] = f"{int(content['tabsize'])} spaces"
+    if content.get('profile'):
+        options['profile'] = True
+    return options
+
+
 @app.route('/code', methods=['GET', 'POST'])
 def result():
     if request.json:
         content = request.json
-        with open('student_file.java', 'w') as file:
-            file.write(str(content['code']))
-        tests = checker.main('student_file.java',
-                             mode='web', verbose=True, debug=True, tabsize=int(content['tabsize']))
+        if not slots.acquire(blocking=False):
+            return busy()
+        try:
+            tests = pool.submit(run_check, str(content['code']),
+                                get_options(content)).result()
+        finally:
+            slots.release()
         return json.dumps(tests, cls=SetEncoder)
     return "No code"
+
+
+@app.route('/code/batch', methods=['POST'])
+def batch_result():
+    try:
+        sources = batch_sources()
+    except (zipfile.BadZipFile, KeyError, TypeError):
+        return 'Send {"files": {name: code}} or a zip archive of .java files', 400
+    if sources is None:
+        return too_large()
+    content = request.json if request.is_json else request.args
+    # one options dict for the whole batch, so each worker parses the
+    # tabsize once and reuses its checker for every file
+    options = get_options(content)
+    if not sources:
+        return compressed(json.dumps({'files': {}}))
+    if not slots.acquire(blocking=False):
+        return busy()
+    results = check_batch([code for name, code in sources], options)
+    files = dict(zip((name for name, code in sources), results))
+    return compressed(json.dumps({'files': files}, cls=SetEncoder))
+
+
+@app.route('/code/stream', methods=['POST'])
+def stream_result():
+    content = request.json
+    if not slots.acquire(blocking=False):
+        return busy()
+    # streams are not timed, so the summary is always what /code returns
+    # without profile
+    options = get_options(content)
+    options.pop('profile', None)
+    try:
+        # streamed from this process, like the sessions below, since
+        # diagnostics leave as soon as each line is checked
+        stream = checker.stream_source(str(content['code']), options=options)
+    except BaseException:
+        slots.release()
+        raise
+
+    def events():
+        for diagnostic in stream.iter_diagnostics(stream.mode):
+            yield event('diagnostic',
+                        checker.diagnostic_record(stream.filename, diagnostic))
+        yield event('summary', stream.summary())
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache',
+                                 'X-Accel-Buffering': 'no'})
+    response.call_on_close(slots.release)
+    return response
+
+
+@app.route('/code/session', methods=['POST'])
+def start_session():
+    content = request.json
+    if not slots.acquire(blocking=False):
+        return busy()
+    try:
+        session = checker.incremental_source(str(content['code']),
+                                             options=get_options(content))
+        results = session.results()
+    finally:
+        slots.release()
+    session_id = secrets.token_hex(16)
+    with sessions_lock:
+        sessions[session_id] = (threading.Lock(), session)
+        while len(sessions) > SESSIONS:
+            sessions.popitem(last=False)
+    return json.dumps({'session': session_id, 'results': results},
+                      cls=SetEncoder)
+
+
+@app.route('/code/session/<session_id>', methods=['POST'])
+def edit_session(session_id):
+    content = request.json
+    with sessions_lock:
+        if session_id not in sessions:
+            return 'Unknown session, start a new one', 404
+        sessions.move_to_end(session_id)
+        lock, session = sessions[session_id]
+    if not slots.acquire(blocking=False):
+        return busy()
+    try:
+        with lock:
+            session.update(int(content['start']), int(content['end']),
+                           str(content['code']))
+            results = session.results()
+    except ValueError as error:
+        return str(error), 400
+    finally:
+        slots.release()
+    return json.dumps({'session': session_id, 'results': results},
+                      cls=SetEncoder)
+
+
+if __name__ == '__main__':
+    app.run(host=os.environ.get('CHECKER_HOST', '127.0.0.1'),
+            port=int(os.environ.get('CHECKER_PORT', 5000)), threaded=True)
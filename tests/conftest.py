@@ -0,0 +1,40 @@
+"""Fixtures shared by the tests: a file of each benchmark corpus style, and
+a full serial check to compare the other ways of checking against"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import STYLES, generate  # noqa: E402
+
+LINES = 1500
+
+
+@pytest.fixture(scope='session')
+def corpus(tmp_path_factory):
+    """A file of each corpus style, by style"""
+    directory = tmp_path_factory.mktemp('corpus')
+    files = {}
+    for style in STYLES:
+        name = style.capitalize()
+        files[style] = str(directory / f'{name}.java')
+        with open(files[style], 'w') as f:
+            f.write(generate(LINES, style, name=name))
+    return files
+
+
+def _serial(guide, filename):
+    """The result and report of a full serial check (check_all)"""
+    lines = checker.readlines(filename)
+    check = guide.checker_class(filename, guide.checks, options=guide.options,
+                                mode=guide.mode, lines=lines)
+    return check.check_all(None, guide.mode), check.report
+
+
+@pytest.fixture
+def serial():
+    return _serial
@@ -0,0 +1,64 @@
+"""Result cache: entries on disk must outlive the module that wrote them"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+MODES = ('visible', 'private', 'web')
+
+
+def load_as(name):
+    """A separate copy of the checker module, imported under name (the web
+    API loads it as '*', the command line runs it as __main__)"""
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, 'style_checker_modular.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_round_trip_across_module_names(tmp_path):
+    filename = os.path.join(ROOT, 'Test.java')
+    writer = load_as('*')
+    for mode in MODES:
+        written, report = writer.CodeQualityChecker(
+            mode=mode, verbose=True, cache_size=0,
+            cache_dir=str(tmp_path)).check(filename)
+        result, read, cached = checker.CodeQualityChecker(
+            mode=mode, verbose=True, cache_size=0,
+            cache_dir=str(tmp_path)).check_cached(filename)
+        assert cached
+        assert result == written
+        assert read.present_file_results() == report.present_file_results()
+        assert list(read.iter_diagnostics()) == \
+            list(report.iter_diagnostics())
+    assert not [name for name in os.listdir(tmp_path)
+                if not name.endswith('.pickle')]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    filename = os.path.join(ROOT, 'Test.java')
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0,
+                                       cache_dir=str(tmp_path))
+    expected = guide.check(filename)[0]
+    for name in os.listdir(tmp_path):
+        with open(tmp_path / name, 'wb') as f:
+            f.write(b'\x80\x05not a pickle')
+    result, report, cached = guide.check_cached(filename)
+    assert not cached
+    assert result == expected
+    assert guide.check_cached(filename)[2]
+
+
+def test_eviction_stops_at_low_water(tmp_path):
+    cache = checker.ResultCache(0, str(tmp_path), 200000)
+    report = checker.GenerateReport(False, 'web')
+    report.init_file('<source>', None)
+    for index in range(500):
+        cache.put(f'{index:064x}', (['x' * 1000], report))
+    size = sum(os.path.getsize(tmp_path / name)
+               for name in os.listdir(tmp_path))
+    assert size == cache.disk_bytes <= 200000
@@ -0,0 +1,31 @@
+"""Every way of reading a source (a file, text or bytes held in memory, or a
+stream) must give the same lines, and so the same results"""
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import generate  # noqa: E402
+
+MODES = ('visible', 'private', 'web')
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_crlf(tmp_path, serial, mode):
+    source = generate(300, 'mixed', name='Crlf').replace('\n', '\r\n')
+    filename = str(tmp_path / 'Crlf.java')
+    with open(filename, 'w', newline='') as f:
+        f.write(source)
+    guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+    expected = guide.check_source(source.replace('\r\n', '\n'))
+    assert guide.check(filename)[0] == expected
+    assert guide.check_source(source) == expected
+    assert guide.check_source(source.encode()) == expected
+    result, report = serial(guide, filename)
+    assert Counter(guide.stream(filename)) == \
+        Counter(report.iter_diagnostics())
@@ -0,0 +1,46 @@
+"""Incremental sessions must report what a full check of the edited source
+reports, after every edit"""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import STYLES  # noqa: E402
+
+MODES = ('visible', 'private', 'web')
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_random_edits(corpus, mode):
+    rng = random.Random(mode)
+    guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+    pool = [line for style in STYLES
+            for line in checker.readlines(corpus[style])[3:-2]]
+    # unterminated text too, which must be ended unless it reaches the end
+    pool += ['/*\n', '*/\n', '}\n', '{\n', '\n', 'x /* a */ y\n', 'int y;']
+    session = guide.incremental(''.join(rng.sample(pool, 300)))
+    for step in range(150):
+        total = len(session.lines)
+        start = rng.randint(0, total)
+        end = min(total, start + rng.randint(0, 3))
+        text = ''.join(rng.choice(pool) for _ in range(rng.randint(0, 3)))
+        session.update(start, end, text)
+        source = ''.join(session.lines)
+        assert session.lines == checker.StringIO(source,
+                                                 newline=None).readlines()
+        assert session.results() == guide.check_source(source), step
+
+
+def test_edits_outside_the_file_are_rejected():
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0)
+    with open(os.path.join(ROOT, 'Test.java')) as f:
+        source = f.read()
+    session = guide.incremental(source)
+    with pytest.raises(ValueError):
+        session.update(500, 600, 'int x;\n')
+    assert session.results() == guide.check_source(source)
@@ -0,0 +1,75 @@
+"""Lexer cases: literals and comments must never look like code to the checks"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+SOURCE = '''public class Lexer {
+    public static void main(String[] args) {
+        String first = "break;";
+        String second = "http://x"; // break;
+        int third = 1; /* break; */ int fourth = 2;
+        int c = 3; /* open
+        break;
+        */
+        while (true) {
+            break;
+        }
+    }
+}
+'''
+
+
+def test_string_is_masked():
+    code, text, spans, in_comment = checker.lex('String s = "break;";\n')
+    assert code == 'String s = "xxxxxx";\n'
+    assert text == 'String s = "break;";\n'
+    assert spans == (('string', 11, 19),)
+    assert not in_comment
+
+
+def test_line_comment_in_string():
+    code, text, spans, in_comment = checker.lex(
+        'String u = "http://x"; // note\n')
+    assert code == 'String u = "xxxxxxxx";\n'
+    assert text == 'String u = "http://x";\n'
+    assert spans == (('string', 11, 21), ('comment', 23, 30))
+    assert not in_comment
+
+
+def test_block_comment_mid_line():
+    code, text, spans, in_comment = checker.lex(
+        'int a = 1; /* break; */ int b = 2;\n')
+    assert 'break' not in code
+    assert code.startswith('int a = 1;') and code.endswith('int b = 2;\n')
+    assert spans == (('comment', 11, 23),)
+    assert not in_comment
+
+
+def test_code_before_unclosed_block_comment():
+    code, text, spans, in_comment = checker.lex('int x = 1; /* open\n')
+    assert code == 'int x = 1;\n'
+    assert in_comment
+    code, text, spans, in_comment = checker.lex('break;\n', True)
+    assert code == '\n' and in_comment
+    code, text, spans, in_comment = checker.lex('still */ int y;\n', True)
+    assert code == ' int y;\n'
+    assert not in_comment
+
+
+def test_char_literal_quote():
+    code, text, spans, in_comment = checker.lex("char c = '\"'; break;\n")
+    assert code == "char c = 'x'; break;\n"
+    assert spans == (('char', 9, 12),)
+
+
+def test_checks_see_only_code():
+    errors = {(category, line) for category, line, count, message, content
+              in checker.check_source(SOURCE)}
+    assert ('[FORBIDDEN] Break', 10) in errors
+    assert not any(category == '[FORBIDDEN] Break' and line != 10
+                   for category, line in errors)
+    # the declaration before the unclosed comment is still checked
+    assert ('Non-Descriptive variable name', 6) in errors
@@ -0,0 +1,92 @@
+"""Batch manifest: re-runs reuse only results that match the files on disk"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import generate  # noqa: E402
+
+
+def write_course(directory, files=6):
+    for index in range(files):
+        name = f'Mixed{index}'
+        with open(os.path.join(directory, name + '.java'), 'w') as f:
+            f.write(generate(120, 'mixed', index, name))
+
+
+def run(guide, directory):
+    """{filename: (result, cached)} of a threaded batch run"""
+    return {filename: (result, cached) for filename, result, report, cached
+            in guide.iter_batch(str(directory), threads=True)}
+
+
+def test_rerun_reuses_unchanged_files(tmp_path):
+    write_course(tmp_path)
+    manifest = str(tmp_path / 'course.manifest')
+    plain = run(checker.CodeQualityChecker(mode='web', cache_size=0),
+                tmp_path)
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0,
+                                       manifest=manifest)
+    first = run(guide, tmp_path)
+    assert not any(cached for result, cached in first.values())
+
+    edited = str(tmp_path / 'Mixed2.java')
+    with open(edited, 'a') as f:
+        f.write('class Extra { int x; }\n')
+    again = run(guide, tmp_path)
+    assert [filename for filename, (result, cached) in again.items()
+            if not cached] == [edited]
+    assert list(again) == list(plain)
+    for filename, (result, cached) in again.items():
+        if filename != edited:
+            assert result == plain[filename][0]
+
+    other = run(checker.CodeQualityChecker(mode='visible', cache_size=0,
+                                           manifest=manifest), tmp_path)
+    assert not any(cached for result, cached in other.values())
+
+
+def test_manifest_outlives_the_module_that_wrote_it(tmp_path):
+    write_course(tmp_path)
+    manifest = str(tmp_path / 'course.manifest')
+    spec = importlib.util.spec_from_file_location(
+        '__checker__', os.path.join(ROOT, 'style_checker_modular.py'))
+    writer = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(writer)
+    written = {filename: result for filename, result, report, cached
+               in writer.CodeQualityChecker(
+                   mode='web', cache_size=0, manifest=manifest).iter_batch(
+                       str(tmp_path), threads=True)}
+
+    again = run(checker.CodeQualityChecker(mode='web', cache_size=0,
+                                           manifest=manifest), tmp_path)
+    assert all(cached for result, cached in again.values())
+    assert {filename: result for filename, (result, cached)
+            in again.items()} == written
+
+
+class ChangingChecker(checker.CodeQualityChecker):
+    """Rewrites each file right after reading it, as a submission landing
+    in the middle of a run would"""
+
+    def check_cached(self, filename, expected=None, lines=None):
+        checked = super().check_cached(filename, expected, lines)
+        with open(filename, 'a') as f:
+            f.write('class Late { int y; }\n')
+        return checked
+
+
+def test_file_changed_mid_run_is_checked_again(tmp_path):
+    write_course(tmp_path, 2)
+    manifest = str(tmp_path / 'course.manifest')
+    run(ChangingChecker(mode='web', cache_size=0, manifest=manifest),
+        tmp_path)
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0,
+                                       manifest=manifest)
+    again = run(guide, tmp_path)
+    for filename, (result, cached) in again.items():
+        assert not cached
+        assert result == guide.check(filename)[0]
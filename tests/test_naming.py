@@ -0,0 +1,53 @@
+"""Naming checks on method headers: parameters are read the same way for
+static and instance methods, and a throws clause is not a parameter"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+SOURCE = '''public class Names {
+    public static void first(int myCount, String Name) {
+    }
+
+    public void second(int MyCount) {
+    }
+
+    public static void third(int q) {
+    }
+
+    public void fourth(int q) {
+    }
+
+    public static void fifth(int count, String text) throws FileNotFoundException {
+    }
+
+    public void sixth(int count, double total) {
+    }
+}
+'''
+
+
+def test_declaration_params():
+    declaration = checker._getDeclaration(
+        'public static void first(int myCount, String Name) {')
+    assert declaration.name == 'first'
+    assert declaration.params == (('int', 'myCount'), ('String', 'Name'))
+    assert checker._getDeclaration(
+        'public void sixth(int count, double total) {').params == \
+        (('int', 'count'), ('double', 'total'))
+    assert checker._getDeclaration(
+        'public static void fifth(int count) throws IOException {').params == \
+        (('int', 'count'),)
+
+
+def test_method_headers():
+    errors = [(category, line) for category, line, count, message, content
+              in checker.check_source(SOURCE)]
+    assert errors == [
+        ('Incorrect camel casing', 2),
+        ('Incorrect camel casing', 5),
+        ('Non-Descriptive variable name', 8),
+        ('Non-Descriptive variable name', 11),
+    ]
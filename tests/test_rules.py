@@ -0,0 +1,92 @@
+"""Rule configuration files and their compiled copies in __pycache__"""
+import os
+import pickle
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+SOURCE = '''public class Rules {
+    public static void first() {
+  int s = 1;
+        while (true) {
+            break;
+        }
+        String line = "a very long line that goes on and on well past sixty";
+    }
+    public static void second() {
+        Scanner s = new Scanner(System.in);
+    }
+}
+'''
+
+
+def categories(rules=None):
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0, rules=rules)
+    return {(category, line) for category, line, count, message, content
+            in guide.check_source(SOURCE)}
+
+
+def write_rules(tmp_path, text):
+    path = tmp_path / 'hw.ini'
+    path.write_text(text)
+    checker._rule_sets.clear()
+    return str(path)
+
+
+def test_default_rules():
+    found = categories()
+    assert ('[FORBIDDEN] Break', 5) in found
+    assert ('Under Indentation', 3) in found
+    assert ('Blank Lines Between Methods', 8) in found
+    assert ('Non-Descriptive variable name', 10) in found
+    assert ('Long lines', 7) not in found
+
+
+def test_checks_names_and_thresholds(tmp_path):
+    found = categories(write_rules(tmp_path, '''
+[checks]
+disable = break, under_indentation, check_blank_lines_between_methods
+
+[thresholds]
+max_line_length = 60
+
+[names]
+Scanner = s
+'''))
+    assert not any(category in ('[FORBIDDEN] Break', 'Under Indentation',
+                                'Blank Lines Between Methods')
+                   for category, line in found)
+    assert ('Long lines', 7) in found
+    assert ('Non-Descriptive variable name', 10) not in found
+
+
+def test_compiled_rules_are_reused(tmp_path):
+    path = write_rules(tmp_path, '[checks]\ndisable = break\n')
+    rules = checker.load_rules(path)
+    compiled = [entry.path for entry in os.scandir(tmp_path / '__pycache__')]
+    assert len(compiled) == 1
+    with open(compiled[0], 'rb') as f:
+        assert pickle.load(f)['digest'] == rules.digest
+
+    checker._rule_sets.clear()
+    loaded = checker.load_rules(path)
+    assert loaded is not rules and loaded.digest == rules.digest
+    assert [name for name, check, args in loaded.checks['visible']] == \
+        [name for name, check, args in rules.checks['visible']]
+
+
+def test_corrupt_compiled_rules_are_recompiled(tmp_path):
+    path = write_rules(tmp_path, '[checks]\ndisable = break\n')
+    checker.load_rules(path)
+    for entry in os.scandir(tmp_path / '__pycache__'):
+        with open(entry.path, 'wb') as f:
+            f.write(pickle.dumps({'digest': 'x'})[:-3])
+        checker._rule_sets.clear()
+        assert ('[FORBIDDEN] Break', 5) not in categories(path)
+        for state in ({'unexpected': 1}, ['not', 'a', 'rule set'], None):
+            with open(entry.path, 'wb') as f:
+                pickle.dump(state, f)
+            checker._rule_sets.clear()
+            assert ('[FORBIDDEN] Break', 5) not in categories(path)
@@ -0,0 +1,26 @@
+"""Checks split into chunks across worker processes must report exactly
+what a serial check reports"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import STYLES  # noqa: E402
+
+MODES = ('visible', 'private', 'web')
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('style', STYLES)
+def test_split(corpus, style, mode):
+    guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+    split = checker.CodeQualityChecker(mode=mode, cache_size=0,
+                                       split_lines=1)
+    # many small chunks, so that chunks start inside comments and blocks
+    split.min_chunk_lines = 50
+    split.chunks_per_worker = 8
+    assert split.check(corpus[style])[0] == guide.check(corpus[style])[0]
@@ -0,0 +1,98 @@
+"""Class-wide rule statistics must agree with counting the errors by hand"""
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+CATEGORIES = list(checker.BANK)[:12]
+
+
+@pytest.fixture(scope='module')
+def submissions():
+    """RuleStatistics of random reports, with the (filename, student,
+    assignment, {category: lines}) they were made from"""
+    rng = random.Random(22)
+    statistics = checker.RuleStatistics()
+    raw = []
+    for index in range(400):
+        report = checker.GenerateReport(verbose=False, mode='web')
+        report.init_file('<source>', None)
+        errors = {}
+        for _ in range(rng.randint(0, 12)):
+            category = rng.choice(CATEGORIES[:rng.randint(1, 12)])
+            line = rng.randint(1, 200)
+            report.error(line, category, checker.BANK[category], None, 'x\n')
+            errors.setdefault(category, []).append(line)
+        filename = f'S{index}.java'
+        student, assignment = f'student{index % 90}', f'hw{index % 5}'
+        statistics.add(filename, report, student, assignment)
+        raw.append((filename, student, assignment, errors))
+    return statistics, raw
+
+
+def units(raw, per, category=None, assignment=None):
+    """Errors of each file, student or assignment, counted by hand"""
+    counts = Counter()
+    for filename, student, label, errors in raw:
+        if assignment is None or label == assignment:
+            unit = {'file': filename, 'student': student,
+                    'assignment': label}[per]
+            counts[unit] += sum(len(lines) for name, lines in errors.items()
+                                if category is None or name == category)
+    return counts
+
+
+@pytest.mark.parametrize('assignment', (None, 'hw3', 'missing'))
+def test_frequency(submissions, assignment):
+    statistics, raw = submissions
+    errors, files = Counter(), Counter()
+    for filename, student, label, found in raw:
+        if assignment is None or label == assignment:
+            for category, lines in found.items():
+                errors[category] += len(lines)
+                files[category] += 1
+    frequency = statistics.frequency(assignment)
+    assert {category: (count, used) for category, count, used
+            in frequency} == {category: (errors[category], files[category])
+                              for category in errors}
+    assert [count for category, count, used in frequency] == \
+        sorted(errors.values(), reverse=True)
+
+
+@pytest.mark.parametrize('per', ('file', 'student', 'assignment'))
+@pytest.mark.parametrize('category', (None, CATEGORIES[0], 'missing'))
+@pytest.mark.parametrize('assignment', (None, 'hw1'))
+def test_histogram_and_top(submissions, per, category, assignment):
+    statistics, raw = submissions
+    counts = units(raw, per, category, assignment)
+    assert statistics.histogram(category, per, assignment) == \
+        sorted(Counter(counts.values()).items())
+    top = statistics.top(5, category, per, assignment)
+    assert [count for name, count in top] == \
+        sorted((count for count in counts.values() if count),
+               reverse=True)[:5]
+    assert all(counts[name] == count for name, count in top)
+
+
+def test_lines_save_load_and_discard(submissions, tmp_path):
+    statistics, raw = submissions
+    filename, student, assignment, errors = raw[17]
+    for category, lines in errors.items():
+        assert statistics.get_lines(filename, category) == lines
+
+    statistics.save(str(tmp_path / 'class.stats'))
+    loaded = checker.RuleStatistics.load(str(tmp_path / 'class.stats'))
+    assert loaded.frequency('hw2') == statistics.frequency('hw2')
+    assert loaded.top(3, None, 'student') == statistics.top(3, None, 'student')
+
+    loaded.discard('hw3')
+    kept = [entry for entry in raw if entry[2] != 'hw3']
+    assert loaded.frequency('hw3') == []
+    assert loaded.histogram(None, 'file') == \
+        sorted(Counter(units(kept, 'file').values()).items())
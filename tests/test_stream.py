@@ -0,0 +1,36 @@
+"""Streaming checks must yield exactly the diagnostics of a full check"""
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+import style_checker_modular as checker  # noqa: E402
+from corpus import STYLES  # noqa: E402
+
+MODES = ('visible', 'private', 'web')
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('style', STYLES)
+def test_stream(corpus, serial, style, mode):
+    guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+    result, report = serial(guide, corpus[style])
+    assert Counter(guide.stream(corpus[style])) == \
+        Counter(report.iter_diagnostics())
+
+
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('style', STYLES)
+def test_stream_source(corpus, serial, style, mode):
+    guide = checker.CodeQualityChecker(mode=mode, cache_size=0)
+    result, report = serial(guide, corpus[style])
+    with open(corpus[style]) as f:
+        stream = guide.stream_source(f.read(), corpus[style])
+    assert Counter(stream.iter_diagnostics(mode)) == \
+        Counter(report.iter_diagnostics())
+    # including the Total Lines Checked of visible and private mode
+    assert stream.summary() == result
@@ -0,0 +1,59 @@
+"""Block index built while checking indentation, and the blank line check
+that fires when a member of the top level class closes"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import style_checker_modular as checker  # noqa: E402
+
+SOURCE = '''public class Blocks {
+    public static void first() {
+        while (true) {
+            first();
+        }}
+    public static void second() {
+        if (true) {
+            second();
+        }
+    }
+
+    public static void third() {
+    }
+    public static void fourth() {
+    }
+}
+'''
+
+
+def checked():
+    guide = checker.CodeQualityChecker(mode='web', cache_size=0)
+    check = guide.checker_class('Blocks.java', guide.checks,
+                                options=guide.options, mode='web',
+                                lines=SOURCE.splitlines(True))
+    return check.check_all(None, 'web'), check.structure
+
+
+def test_blocks():
+    result, structure = checked()
+    assert structure.get_blocks() == [
+        ('class', 1, 16, 0),
+        ('method', 2, 5, 1),
+        ('block', 3, 5, 2),
+        ('method', 6, 10, 1),
+        ('block', 7, 9, 2),
+        ('method', 12, 13, 1),
+        ('method', 14, 15, 1),
+    ]
+    assert structure.enclosing(8) == 4
+    assert structure.enclosing(8, 'method') == 3
+    assert structure.enclosing(8, 'class') == 0
+    assert structure.depth == 0
+
+
+def test_blank_lines_between_methods():
+    result, structure = checked()
+    # '}}' closes the while loop and the method, so line 5 ends a member
+    assert [(category, line) for category, line, count, message, content
+            in result] == [('Blank Lines Between Methods', 5),
+                           ('Blank Lines Between Methods', 13)]